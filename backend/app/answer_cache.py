@@ -0,0 +1,76 @@
+"""Semantic cache for /ask answers.
+
+Questions are embedded into a dedicated Chroma collection (cosine space).
+When a new question lands within ``CACHE_MAX_DISTANCE`` of a previously
+answered one, the stored answer is returned without retrieval or an LLM call.
+Questions are embedded through the memoised ``vector_store.embed_query``, so
+the lookup, the insert and retrieval on a miss share one embedding.
+
+Entries expire after ``answer_cache_ttl`` seconds and the whole cache is
+cleared whenever a policy document is uploaded, since new content can
+change any answer.
+"""
+import hashlib
+import time
+from functools import lru_cache
+
+import orjson
+from langchain_chroma import Chroma
+
+from app.config import get_settings
+from app.embeddings import get_embeddings
+from app.vector_store import embed_query
+
+CACHE_COLLECTION = "ask_cache"
+CACHE_MAX_DISTANCE = 0.08   # cosine distance; ~0.92 similarity or closer
+
+
+@lru_cache(maxsize=1)
+def _cache_store() -> Chroma:
+    s = get_settings()
+    s.chroma_persist_dir.mkdir(parents=True, exist_ok=True)
+    return Chroma(
+        collection_name=CACHE_COLLECTION,
+        embedding_function=get_embeddings(),
+        persist_directory=str(s.chroma_persist_dir),
+        collection_metadata={"hnsw:space": "cosine"},
+    )
+
+
+def get_cached_answer(question: str) -> dict | None:
+    """Return the cached result for a (near-)identical question, or None."""
+    ttl = get_settings().answer_cache_ttl
+    if ttl <= 0:
+        return None
+    hits = _cache_store()._collection.query(
+        query_embeddings=[embed_query(question)],
+        n_results=1,
+        include=["metadatas", "distances"],
+    )
+    if not hits["ids"][0]:
+        return None
+    metadata, distance = hits["metadatas"][0][0], hits["distances"][0][0]
+    if distance >= CACHE_MAX_DISTANCE or time.time() - metadata["ts"] > ttl:
+        return None
+    return orjson.loads(metadata["result_json"])
+
+
+def cache_answer(question: str, result: dict) -> None:
+    """Store ``result`` for ``question`` and evict expired entries."""
+    ttl = get_settings().answer_cache_ttl
+    if ttl <= 0:
+        return
+    now = time.time()
+    store = _cache_store()
+    store._collection.delete(where={"ts": {"$lt": now - ttl}})
+    store._collection.upsert(
+        ids=[hashlib.sha256(question.encode("utf-8")).hexdigest()],
+        embeddings=[embed_query(question)],
+        metadatas=[{"result_json": orjson.dumps(result).decode(), "ts": now}],
+        documents=[question],
+    )
+
+
+def clear_answer_cache() -> None:
+    """Drop every cached answer (called when the policy corpus changes)."""
+    _cache_store()._collection.delete(where={"ts": {"$gte": 0}})
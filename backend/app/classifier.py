@@ -11,9 +11,20 @@ Each class also carries a recommended `top_k` for retrieval tuning.
 """
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 
+try:
+    import hyperscan  # optional accelerator
+except ImportError:
+    hyperscan = None
 
-@dataclass
+try:
+    import re2  # optional linear-time engine (google-re2)
+except ImportError:
+    re2 = None
+
+
+@dataclass(frozen=True, slots=True)
 class QueryClass:
     label: str          # one of the 5 classes above
     top_k: int          # recommended retrieval count
@@ -55,6 +66,102 @@ _GAP_PATTERNS = re.compile(
 )
 
 
+# Groups in priority order (gap > scenario > summary > numeric): the first
+# group that matches wins.  Searching them one by one and stopping at the
+# first hit is faster with the stdlib engine than one combined alternation,
+# which has to be tried at every position of the question.
+_PRIORITY = ("policy_gap", "scenario_analysis", "summary_request", "numeric_lookup")
+_RE_GROUPS = (_GAP_PATTERNS, _SCENARIO_PATTERNS, _SUMMARY_PATTERNS, _NUMERIC_PATTERNS)
+
+
+def _build_hyperscan_db():
+    """Compile all groups into one Hyperscan database, or None if unavailable.
+
+    Hyperscan reports every group that matches in a single SIMD pass; ids are
+    the priority ranks so the smallest id seen is the winning label.
+    """
+    if hyperscan is None:
+        return None
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[
+                p.pattern.encode()
+                for p in _RE_GROUPS
+            ],
+            ids=list(range(len(_PRIORITY))),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(_PRIORITY),
+        )
+        return db
+    except Exception:
+        return None
+
+
+_HS_DB = _build_hyperscan_db()
+
+
+def _build_re2_groups():
+    """Compile each group with RE2 (DFA, no backtracking on the '.*' gaps)."""
+    if re2 is None:
+        return None
+    try:
+        return tuple(
+            re2.compile("(?i)" + p.pattern)
+            for p in _RE_GROUPS
+        )
+    except Exception:
+        return None
+
+
+_RE2_GROUPS = _build_re2_groups()
+
+# Only five outcomes exist, so classify_query hands out shared instances.
+_RESULTS = {
+    qc.label: qc
+    for qc in (
+        QueryClass("policy_gap", 3, "Question asks whether a topic is covered in the document."),
+        QueryClass("scenario_analysis", 7, "Question describes a hypothetical or real-world scenario."),
+        QueryClass("summary_request", 10, "Question asks for a summary or overview."),
+        QueryClass("numeric_lookup", 4, "Question asks for a numeric value or limit."),
+        QueryClass("factual_lookup", 5, "General factual policy question."),
+    )
+}
+
+
+def _hs_scan(q: str) -> int:
+    """Return the best priority rank matched by Hyperscan (len(_PRIORITY) if none)."""
+    best = [len(_PRIORITY)]
+
+    def _on_match(rank, start, end, flags, context):
+        if rank < best[0]:
+            best[0] = rank
+        return rank == 0  # truthy return stops the scan early
+
+    try:
+        _HS_DB.scan(q.encode(), match_event_handler=_on_match)
+    except hyperscan.ScanTerminated:
+        pass
+    return best[0]
+
+
+def _scan(q: str) -> str:
+    """Return the highest-priority label matched anywhere in ``q``."""
+    # Hyperscan and RE2 both treat \b as ASCII-only, so keep Unicode text on
+    # the re path to preserve its word-boundary semantics.
+    groups = _RE_GROUPS
+    if q.isascii():
+        if _HS_DB is not None:
+            best = _hs_scan(q)
+            return _PRIORITY[best] if best < len(_PRIORITY) else "factual_lookup"
+        if _RE2_GROUPS is not None:
+            groups = _RE2_GROUPS
+
+    for label, pattern in zip(_PRIORITY, groups):
+        if pattern.search(q):
+            return label
+    return "factual_lookup"
+
+
 # ---------------------------------------------------------------------------
 # Public classifier function
 # ---------------------------------------------------------------------------
@@ -70,38 +177,10 @@ def classify_query(question: str) -> QueryClass:
         >>> c.label
         'numeric_lookup'
     """
-    q = question.strip()
+    return _classify(question.strip())
 
-    if _GAP_PATTERNS.search(q):
-        return QueryClass(
-            label="policy_gap",
-            top_k=3,
-            reason="Question asks whether a topic is covered in the document.",
-        )
-
-    if _SCENARIO_PATTERNS.search(q):
-        return QueryClass(
-            label="scenario_analysis",
-            top_k=7,
-            reason="Question describes a hypothetical or real-world scenario.",
-        )
-
-    if _SUMMARY_PATTERNS.search(q):
-        return QueryClass(
-            label="summary_request",
-            top_k=10,
-            reason="Question asks for a summary or overview.",
-        )
-
-    if _NUMERIC_PATTERNS.search(q):
-        return QueryClass(
-            label="numeric_lookup",
-            top_k=4,
-            reason="Question asks for a numeric value or limit.",
-        )
 
-    return QueryClass(
-        label="factual_lookup",
-        top_k=5,
-        reason="General factual policy question.",
-    )
+@lru_cache(maxsize=4096)
+def _classify(q: str) -> QueryClass:
+    """Cached core of :func:`classify_query` (pure in ``q``; results are frozen)."""
+    return _RESULTS[_scan(q)]
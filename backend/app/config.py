@@ -1,4 +1,5 @@
 """Application configuration from environment variables."""
+from functools import lru_cache
 from pathlib import Path
 
 from pydantic import Field
@@ -29,6 +30,12 @@ class Settings(BaseSettings):
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"  # Hugging Face model or OpenAI model name
     embedding_api_key: str | None = None  # Only needed for OpenAI embeddings
     embedding_base_url: str | None = None  # Only needed for OpenAI embeddings
+    embedding_device: str = "auto"  # Hugging Face only: "auto", "cpu", "cuda", "cuda:1", "mps"…
+    embedding_batch_size: int = 128  # Hugging Face encode batch size
+    embedding_compile: bool = False  # Hugging Face only: torch.compile the transformer (slow first call)
+    # Shorter stored vectors (e.g. 512 for text-embedding-3-*); only for models
+    # trained for truncation.  Changing it requires re-ingesting documents.
+    embedding_dimensions: int | None = None
 
     class Config:
         env_file = str(_DOT_ENV)
@@ -38,11 +45,49 @@ class Settings(BaseSettings):
     # Document processing
     chunk_size: int = 1000
     chunk_overlap: int = 200
+    enable_tables: bool = True     # extract + index PDF tables on policy uploads
+    enable_sections: bool = True   # detect + LLM-summarise sections on policy uploads
+    summary_max_concurrency: int = 8   # section summaries in flight at once
+
+    # Browser origins allowed to call the API (JSON list in env, e.g.
+    # CORS_ORIGINS='["https://policy.example.com"]'); ["*"] allows any.
+    cors_origins: list[str] = ["http://127.0.0.1:8000", "http://localhost:8000"]
+
+    # /ask semantic answer cache: seconds a cached answer stays valid (0 disables)
+    answer_cache_ttl: int = 24 * 3600
+    # In-process memo of exact repeat questions inside answer_question
+    # (env: POLICYASSIST_CACHE=1); shares answer_cache_ttl.
+    policyassist_cache: bool = False
+    # Semantic retrieval cache: a query within this cosine similarity of a
+    # recent one (same collection) reuses its hits instead of searching again.
+    retrieval_cache: bool = True
+    retrieval_cache_size: int = 1024
+    retrieval_cache_threshold: float = 0.97
+    retrieval_cache_ttl: float = 300   # seconds; 0 = no expiry
+    # Lookups switch from an exact scan to LSH buckets once the cache holds
+    # this many entries, so bucketing needs RETRIEVAL_CACHE_SIZE >= it.
+    retrieval_cache_lsh_min_entries: int = 4096
+    # Return the "not in the document" result without calling the LLM when the
+    # best retrieval score is below this (0 disables).
+    min_answer_score: float = 0.35
+
+    # Vector store: "chroma" (default) or "faiss" (pip install faiss-cpu) for
+    # large corpora; compare_* collections always use Chroma.
+    vector_backend: str = "chroma"
+    faiss_sq8: bool = False   # FAISS only: 8-bit scalar-quantised HNSW (~4x less RAM)
+
+    # HNSW index (applied when a collection is created; shared by both backends)
+    hnsw_m: int = 32
+    hnsw_construction_ef: int = 200
+    hnsw_search_ef: int = 64
+    hnsw_compare_search_ef: int = 32   # compare_* collections for /compare_documents
 
     # Persistence
     data_dir: Path = Path(__file__).resolve().parent.parent / "data"
     chroma_persist_dir: Path = Path(__file__).resolve().parent.parent / "data" / "chroma"
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    """Return the process-wide settings (env / .env are parsed once)."""
     return Settings()
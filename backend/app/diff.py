@@ -7,29 +7,133 @@ Each document uploaded for comparison gets its own Chroma collection
   - No cross-contamination with other documents
 
 Algorithm (vectorised, O(n+m) embedding calls):
-  1. Pre-embed ALL chunks from both collections in two batch calls.
-  2. Build a cosine-similarity matrix (n_a × n_b) via normalised dot-product.
+  0. Chunks whose exact text appears in both documents match trivially;
+     identical documents return without embedding anything.
+  1. Reuse the embeddings Chroma stored at ingest time; only if they are
+     unavailable, re-embed the distinct chunk texts in batch calls.
+  2. Compute cosine similarities (normalised dot-products) in cache-sized
+     tiles, keeping only each chunk's best-match score.
   3. Chunks in A with best-match score < THRESHOLD → "removed in B".
   4. Chunks in B with best-match score < THRESHOLD → "added in B".
+  5. Each list reports its MAX_DIFF_ITEMS weakest matches, weakest first.
 """
-from langchain_core.documents import Document
+from concurrent.futures import ThreadPoolExecutor
 
+from app.config import get_settings
 from app.vector_store import get_vector_store
 
+try:
+    import faiss  # optional: AVX2/AVX-512 (or cuBLAS) inner-product search
+except ImportError:
+    faiss = None
+
 SIMILARITY_THRESHOLD = 0.70   # below this → semantically absent
+_TILE = 512                   # block edge for the tiled similarity pass
+_SQ8_MIN_CHUNKS = 4096        # index size from which FAISS scores int8 codes
+MAX_DIFF_ITEMS = 20           # entries returned per added/removed list
+
+
+def _get_all_chunks(collection_name: str):
+    """Retrieve ALL chunks from a Chroma collection as parallel lists.
 
+    Returns ``(texts, metadatas, embeddings)`` straight from Chroma's
+    ``get()`` — no per-chunk ``Document`` objects are built.  ``embeddings``
+    is a float32 ``(n, d)`` array of the vectors stored at ingest time, or
+    ``None`` when Chroma did not return a complete set.
+    """
+    import numpy as np
 
-def _get_all_chunks(collection_name: str) -> list[Document]:
-    """Retrieve ALL chunks from a Chroma collection."""
     store = get_vector_store(collection_name=collection_name)
     try:
-        result = store._collection.get(include=["documents", "metadatas"])
-        return [
-            Document(page_content=text, metadata=meta or {})
-            for text, meta in zip(result["documents"], result["metadatas"])
-        ]
+        result = store._collection.get(include=["documents", "metadatas", "embeddings"])
     except Exception:
-        return []
+        return [], [], None
+    texts = result["documents"] or []
+    metadatas = [m or {} for m in result["metadatas"] or []]
+    stored = result.get("embeddings")
+    embeddings = None
+    if stored is not None and len(stored) == len(texts) and len(texts):
+        embeddings = np.asarray(stored, dtype=np.float32)
+    return texts, metadatas, embeddings
+
+
+def _unique(texts: list[str]) -> tuple[list[str], list[int]]:
+    """Return (distinct texts in first-seen order, index of each input in them)."""
+    index: dict[str, int] = {}
+    inverse = [index.setdefault(t, len(index)) for t in texts]
+    return list(index), inverse
+
+
+def _weakest(idx, scores, limit: int = MAX_DIFF_ITEMS):
+    """Return the ``limit`` entries of ``idx`` with the lowest ``scores``, weakest first."""
+    import numpy as np
+
+    if len(idx) > limit:
+        idx = idx[np.argpartition(scores[idx], limit - 1)[:limit]]
+    return idx[np.argsort(scores[idx], kind="stable")]
+
+
+def _embed_pair(embedder, texts_a: list[str], texts_b: list[str]):
+    """Embed both corpora, overlapping the work where it helps.
+
+    A local HuggingFace model gets one concatenated call (one batching pass,
+    fewer kernel launches); remote providers get two concurrent requests so
+    the network round-trips overlap.
+    """
+    if not texts_b:
+        return embedder.embed_documents(texts_a), []
+    if get_settings().embedding_provider.lower() == "huggingface":
+        vectors = embedder.embed_documents(texts_a + texts_b)
+        return vectors[:len(texts_a)], vectors[len(texts_a):]
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        fut_a = ex.submit(embedder.embed_documents, texts_a)
+        fut_b = ex.submit(embedder.embed_documents, texts_b)
+        return fut_a.result(), fut_b.result()
+
+
+def _faiss_top1(base, queries):
+    """Best inner-product score in ``base`` for every row of ``queries``."""
+    d = base.shape[1]
+    if len(base) >= _SQ8_MIN_CHUNKS:
+        # 8-bit codes move 4× fewer bytes; the score error is far below what
+        # a 0.70 threshold can resolve.
+        index = faiss.IndexScalarQuantizer(
+            d, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+        )
+        index.train(base)
+    else:
+        index = faiss.IndexFlatIP(d)
+        if faiss.get_num_gpus() > 0 and hasattr(faiss, "index_cpu_to_all_gpus"):
+            index = faiss.index_cpu_to_all_gpus(index)
+    index.add(base)
+    scores, _ = index.search(queries, 1)
+    return scores[:, 0]
+
+
+def _best_matches(emb_a, emb_b, tile: int = _TILE):
+    """Return (row_max, col_max) of ``emb_a @ emb_b.T`` without materialising it.
+
+    Uses FAISS flat inner-product search when installed; otherwise the
+    similarity matrix is computed block by block, so peak memory is
+    ``tile × tile`` instead of ``n_a × n_b`` and each block stays cache-resident.
+    """
+    import numpy as np
+
+    if faiss is not None:
+        return _faiss_top1(emb_b, emb_a), _faiss_top1(emb_a, emb_b)
+
+    n_a, n_b = len(emb_a), len(emb_b)
+    row_max = np.full(n_a, -np.inf, dtype=np.float32)
+    col_max = np.full(n_b, -np.inf, dtype=np.float32)
+    for i0 in range(0, n_a, tile):
+        block_a = emb_a[i0:i0 + tile]
+        rows = row_max[i0:i0 + tile]
+        for j0 in range(0, n_b, tile):
+            block = block_a @ emb_b[j0:j0 + tile].T
+            np.maximum(rows, block.max(axis=1), out=rows)
+            cols = col_max[j0:j0 + tile]
+            np.maximum(cols, block.max(axis=0), out=cols)
+    return row_max, col_max
 
 
 def compare_documents(collection_a: str, collection_b: str) -> dict:
@@ -42,10 +146,10 @@ def compare_documents(collection_a: str, collection_b: str) -> dict:
     import numpy as np
     from app.embeddings import get_embeddings
 
-    chunks_a = _get_all_chunks(collection_a)
-    chunks_b = _get_all_chunks(collection_b)
+    texts_a, metas_a, stored_a = _get_all_chunks(collection_a)
+    texts_b, metas_b, stored_b = _get_all_chunks(collection_b)
 
-    if not chunks_a and not chunks_b:
+    if not texts_a and not texts_b:
         return {
             "error": (
                 "Neither document was found. "
@@ -54,69 +158,124 @@ def compare_documents(collection_a: str, collection_b: str) -> dict:
             "source_a": collection_a,
             "source_b": collection_b,
         }
-    if not chunks_a:
+    if not texts_a:
         return {
             "error": f"Document A has no indexed content (collection: {collection_a}).",
             "source_a": collection_a, "source_b": collection_b,
         }
-    if not chunks_b:
+    if not texts_b:
         return {
             "error": f"Document B has no indexed content (collection: {collection_b}).",
             "source_a": collection_a, "source_b": collection_b,
         }
 
-    embedder = get_embeddings()
-
-    # ── Batch-embed both corpora ──────────────────────────────────
-    emb_a = np.array(embedder.embed_documents([c.page_content for c in chunks_a]))
-    emb_b = np.array(embedder.embed_documents([c.page_content for c in chunks_b]))
-
-    # Normalise rows → cosine similarity == dot product
-    emb_a /= np.linalg.norm(emb_a, axis=1, keepdims=True) + 1e-9
-    emb_b /= np.linalg.norm(emb_b, axis=1, keepdims=True) + 1e-9
-
-    # (n_a, n_b) all-pairs cosine similarity
-    sim = emb_a @ emb_b.T
-
-    removed_in_b: list[dict] = []
-    added_in_b: list[dict] = []
-    common_count = 0
-
-    # Best B-match for each A-chunk
-    for i, chunk in enumerate(chunks_a):
-        score = float(sim[i].max())
-        if score < SIMILARITY_THRESHOLD:
-            removed_in_b.append({
-                "page":       chunk.metadata.get("page", "?"),
-                "excerpt":    chunk.page_content[:250].strip(),
-                "similarity": round(score, 3),
-            })
-        else:
-            common_count += 1
-
-    # Best A-match for each B-chunk
-    for j, chunk in enumerate(chunks_b):
-        score = float(sim[:, j].max())
-        if score < SIMILARITY_THRESHOLD:
-            added_in_b.append({
-                "page":       chunk.metadata.get("page", "?"),
-                "excerpt":    chunk.page_content[:250].strip(),
-                "similarity": round(score, 3),
-            })
+    # ── Exact-text shortcut ───────────────────────────────────────
+    # Repeated boilerplate (headers, footers, notices) is embedded once and
+    # scored once; results are scattered back to every copy afterwards.
+    uniq_a, inv_a = _unique(texts_a)
+    uniq_b, inv_b = _unique(texts_b)
+    index_a = {t: i for i, t in enumerate(uniq_a)}
+    set_b = set(uniq_b)
+
+    if len(index_a) == len(set_b) and set_b.issubset(index_a):
+        return {
+            "source_a":     collection_a,
+            "source_b":     collection_b,
+            "added_in_b":   [],
+            "removed_in_b": [],
+            "common_count": len(texts_a),
+            "summary":      "The two documents appear semantically identical.",
+        }
+
+    # Texts present verbatim in both documents match trivially (score 1.0);
+    # only the residual chunks need a similarity search.
+    res_a = np.asarray([i for i, t in enumerate(uniq_a) if t not in set_b], dtype=np.intp)
+    com_a = np.asarray([i for i, t in enumerate(uniq_a) if t in set_b], dtype=np.intp)
+    res_b = np.asarray([j for j, t in enumerate(uniq_b) if t not in index_a], dtype=np.intp)
+
+    # ── Embeddings for the distinct texts of both documents ───────
+    # Prefer the vectors Chroma already stores (no model call at all); fall
+    # back to batch-embedding, where shared texts are embedded once.
+    # float32 is plenty for a 0.70 threshold and halves GEMM memory traffic.
+    if (
+        stored_a is not None and stored_b is not None
+        and stored_a.shape[1] == stored_b.shape[1]
+    ):
+        # inverse indices are assigned in first-seen order, so return_index
+        # yields the first occurrence of each distinct text, in order.
+        emb_a = stored_a[np.unique(inv_a, return_index=True)[1]]
+        emb_new_b = stored_b[np.unique(inv_b, return_index=True)[1][res_b]]
+    else:
+        embedder = get_embeddings()
+        vectors_a, vectors_new_b = _embed_pair(embedder, uniq_a, [uniq_b[j] for j in res_b])
+        emb_a = np.asarray(vectors_a, dtype=np.float32)
+        emb_new_b = np.asarray(vectors_new_b, dtype=np.float32).reshape(len(res_b), emb_a.shape[1])
+
+    # Normalise rows in place → cosine similarity == dot product
+    for emb in (emb_a, emb_new_b):
+        norms = np.linalg.norm(emb, axis=1, keepdims=True)
+        norms += 1e-9
+        np.divide(emb, norms, out=emb)
+
+    emb_b = np.empty((len(uniq_b), emb_a.shape[1]), dtype=np.float32)
+    emb_b[res_b] = emb_new_b
+    for j, t in enumerate(uniq_b):
+        if t in index_a:
+            emb_b[j] = emb_a[index_a[t]]
+
+    # Best B-match for each A-chunk, and best A-match for each B-chunk
+    row_max = np.ones(len(uniq_a), dtype=np.float32)
+    col_max = np.ones(len(uniq_b), dtype=np.float32)
+    col_res = np.full(len(res_b), -np.inf, dtype=np.float32)
+    if len(res_a):
+        rows, cols = _best_matches(emb_a[res_a], emb_b)
+        row_max[res_a] = rows
+        col_res = cols[res_b]
+    if len(res_b):
+        if len(com_a):
+            _, cols = _best_matches(emb_a[com_a], emb_b[res_b])
+            np.maximum(col_res, cols, out=col_res)
+        col_max[res_b] = col_res
+
+    row_max = row_max[np.asarray(inv_a)]
+    col_max = col_max[np.asarray(inv_b)]
+
+    removed_idx = np.nonzero(row_max < SIMILARITY_THRESHOLD)[0]
+    added_idx = np.nonzero(col_max < SIMILARITY_THRESHOLD)[0]
+    common_count = len(texts_a) - len(removed_idx)
+
+    # Only the MAX_DIFF_ITEMS weakest matches are returned, so pick them
+    # in NumPy and build response dicts for those alone.
+    removed_in_b: list[dict] = [
+        {
+            "page":       metas_a[i].get("page", "?"),
+            "excerpt":    texts_a[i][:250].strip(),
+            "similarity": round(float(row_max[i]), 3),
+        }
+        for i in _weakest(removed_idx, row_max)
+    ]
+    added_in_b: list[dict] = [
+        {
+            "page":       metas_b[j].get("page", "?"),
+            "excerpt":    texts_b[j][:250].strip(),
+            "similarity": round(float(col_max[j]), 3),
+        }
+        for j in _weakest(added_idx, col_max)
+    ]
 
     # ── Plain-English summary ─────────────────────────────────────
-    if not removed_in_b and not added_in_b:
+    if not len(removed_idx) and not len(added_idx):
         summary = "The two documents appear semantically identical."
     else:
         parts = []
-        if removed_in_b:
+        if len(removed_idx):
             parts.append(
-                f"{len(removed_in_b)} section(s) from Document A have no close match "
+                f"{len(removed_idx)} section(s) from Document A have no close match "
                 "in Document B — possibly revised or removed."
             )
-        if added_in_b:
+        if len(added_idx):
             parts.append(
-                f"{len(added_in_b)} section(s) in Document B have no close match "
+                f"{len(added_idx)} section(s) in Document B have no close match "
                 "in Document A — possibly new content."
             )
         parts.append(
@@ -127,8 +286,8 @@ def compare_documents(collection_a: str, collection_b: str) -> dict:
     return {
         "source_a":     collection_a,
         "source_b":     collection_b,
-        "added_in_b":   added_in_b[:20],
-        "removed_in_b": removed_in_b[:20],
+        "added_in_b":   added_in_b,
+        "removed_in_b": removed_in_b,
         "common_count": common_count,
         "summary":      summary,
     }
@@ -5,26 +5,79 @@ Chunk metadata stored per chunk:
   - source    : str  — original filename stem
   - chunk_id  : str  — unique id, e.g. "report_p3_c1"
 """
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
 from app.config import get_settings
 
+# Chunk break points, best first: paragraph, line, sentence, word.
+_SEPARATORS = ("\n\n", "\n", ". ", " ")
+_WORD_START_RE = re.compile(r"(?<!\S)\S")
+
+
+# Lower-cased file suffix → loader factory. Add an entry to support a new type.
+_LOADERS = {
+    ".pdf": PyPDFLoader,
+    ".txt": lambda p: TextLoader(p, encoding="utf-8", autodetect_encoding=True),
+    ".text": lambda p: TextLoader(p, encoding="utf-8", autodetect_encoding=True),
+}
+
 
 def load_document(file_path: Path) -> list[Document]:
     """Load a single document from path. Supports PDF and TXT."""
-    path_str = str(file_path)
-    if file_path.suffix.lower() == ".pdf":
-        loader = PyPDFLoader(path_str)
-    elif file_path.suffix.lower() in (".txt", ".text"):
-        loader = TextLoader(path_str, encoding="utf-8", autodetect_encoding=True)
-    else:
+    factory = _LOADERS.get(file_path.suffix.lower())
+    if factory is None:
         raise ValueError(f"Unsupported file type: {file_path.suffix}")
 
-    return loader.load()
+    return factory(str(file_path)).load()
+
+
+def _find_break(text: str, start: int, end: int, lo: int) -> int:
+    """Return the best split point in ``text[start:end]`` that lies past ``lo``."""
+    # Prefer the best-ranked separator in the back half of the window …
+    floor = max(start + (end - start) // 2, lo)
+    for sep in _SEPARATORS:
+        i = text.rfind(sep, floor, end)
+        if i != -1:
+            return i + len(sep)
+    # … else the latest separator of any kind, else a hard cut.
+    best = -1
+    for sep in _SEPARATORS:
+        i = text.rfind(sep, lo, end)
+        if i != -1:
+            best = max(best, i + len(sep))
+    return best if best != -1 else end
+
+
+def _split_text(text: str, size: int, overlap: int) -> list[str]:
+    """Split ``text`` into chunks of at most ``size`` chars in one forward walk.
+
+    Each chunk ends at the best separator near the end of its window
+    (paragraph > line > sentence > word), found with C-level ``rfind`` probes
+    instead of recursive re-splitting. The next chunk starts ``overlap`` chars
+    earlier (snapped forward to a word start) and always ends past this one.
+    """
+    n = len(text)
+    chunks: list[str] = []
+    start = cut = 0
+    while start < n:
+        end = start + size
+        cut = n if end >= n else _find_break(text, start, end, max(start, cut))
+
+        chunk = text[start:cut].strip()
+        if chunk:
+            chunks.append(chunk)
+        if cut >= n:
+            break
+
+        m = _WORD_START_RE.search(text, max(cut - overlap, start + 1), cut) if overlap else None
+        start = m.start() if m else cut
+
+    return chunks
 
 
 def chunk_documents(documents: list[Document]) -> list[Document]:
@@ -36,31 +89,50 @@ def chunk_documents(documents: list[Document]) -> list[Document]:
       - ``chunk_id`` : str  — deterministic id suitable for use as a Chroma document id
     """
     settings = get_settings()
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=settings.chunk_size,
-        chunk_overlap=settings.chunk_overlap,
-        length_function=len,
-        separators=["\n\n", "\n", ". ", " ", ""],
-    )
-    raw_chunks = splitter.split_documents(documents)
+    raw_chunks = [
+        Document(page_content=text, metadata=dict(doc.metadata))
+        for doc in documents
+        for text in _split_text(doc.page_content, settings.chunk_size, settings.chunk_overlap)
+    ]
+
+    # Every chunk of a loaded file shares its raw source path, so resolve
+    # each filename stem (e.g. "employee_handbook") once, not per chunk.
+    stems: dict[str, str] = {}
 
     for i, chunk in enumerate(raw_chunks):
+        meta = chunk.metadata
         # PyPDFLoader sets metadata["page"] as a 0-based int.
         # TextLoader has no page; default to page 1.
-        raw_page = chunk.metadata.get("page", 0)
-        page = int(raw_page) + 1  # convert to 1-based page number
+        page = int(meta.get("page", 0)) + 1  # convert to 1-based page number
 
-        # Source is the filename stem (e.g. "employee_handbook")
-        raw_source = chunk.metadata.get("source", "doc")
-        source = Path(raw_source).stem
+        raw_source = meta.get("source", "doc")
+        source = stems.get(raw_source)
+        if source is None:
+            source = stems[raw_source] = Path(raw_source).stem
 
+        meta["page"] = page
+        meta["source"] = source
         # Build a deterministic chunk id
-        chunk_id = f"{source}_p{page}_c{i}"
-
-        chunk.metadata["page"] = page
-        chunk.metadata["source"] = source
-        chunk.metadata["chunk_id"] = chunk_id
+        meta["chunk_id"] = f"{source}_p{page}_c{i}"
         # Preserve section_title if a loader supplies it (future-proof)
-        chunk.metadata.setdefault("section_title", "")
+        meta.setdefault("section_title", "")
 
     return raw_chunks
+
+
+def _load_and_chunk(file_path: Path) -> list[Document]:
+    return chunk_documents(load_document(file_path))
+
+
+def load_and_chunk_many(paths: list[Path], max_workers: int | None = None) -> list[list[Document]]:
+    """Load and chunk several files in parallel worker processes.
+
+    PDF parsing is CPU-bound per file, so each file is parsed *and* chunked in
+    its own worker (only the finished chunks are sent back).
+
+    Returns one chunk list per input path, in input order.
+    """
+    if len(paths) <= 1:
+        return [_load_and_chunk(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        return list(ex.map(_load_and_chunk, paths))
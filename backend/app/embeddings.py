@@ -1,23 +1,48 @@
 """Embedding model wrapper - supports Hugging Face and OpenAI."""
+from functools import lru_cache
+
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.embeddings.huggingface import HuggingFaceEmbeddings
 
 from app.config import get_settings
 
 
+@lru_cache(maxsize=1)
 def get_embeddings():
     """Create embeddings client from settings.
     Supports Hugging Face (local, no API key) or OpenAI embeddings.
+
+    Cached: the model (and its tokenizer) is loaded once per process.
     """
     s = get_settings()
     
     if s.embedding_provider.lower() == "huggingface":
         # Use Hugging Face embeddings (local, no API key needed)
-        return HuggingFaceEmbeddings(
+        import torch  # installed with sentence-transformers
+
+        device = s.embedding_device
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+
+        model_kwargs = {"device": device}
+        if s.embedding_dimensions:
+            model_kwargs["truncate_dim"] = s.embedding_dimensions
+        embeddings = HuggingFaceEmbeddings(
             model_name=s.embedding_model,
-            model_kwargs={"device": "cpu"},  # Use "cuda" if GPU available
-            encode_kwargs={"normalize_embeddings": True},  # Normalize for better similarity
+            model_kwargs=model_kwargs,
+            encode_kwargs={
+                "normalize_embeddings": True,  # Normalize for better similarity
+                "batch_size": s.embedding_batch_size,
+                "convert_to_numpy": True,
+            },
         )
+        if device.startswith("cuda"):
+            # fp16 halves memory traffic; cosine ranking is unaffected
+            embeddings.client.half()
+        if s.embedding_compile:
+            transformer = embeddings.client[0]
+            transformer.auto_model = torch.compile(transformer.auto_model, mode="reduce-overhead")
+        return embeddings
     elif s.embedding_provider.lower() == "openai":
         # Use OpenAI embeddings (requires API key)
         kwargs = {"model": s.embedding_model}
@@ -27,15 +52,33 @@ def get_embeddings():
         
         if base_url:
             kwargs["openai_api_base"] = base_url
+        if s.embedding_dimensions:
+            # text-embedding-3-* return shortened vectors natively, so the
+            # vector store and HNSW graph shrink proportionally.
+            kwargs["dimensions"] = s.embedding_dimensions
         
         if not api_key:
             raise ValueError(
                 "OpenAI embeddings require an API key. Set EMBEDDING_API_KEY or API_KEY."
             )
         
-        return OpenAIEmbeddings(api_key=api_key, **kwargs)
+        # Up to 2048 inputs per request (the API maximum) instead of the
+        # client's default 1000 → half the round-trips on large batches.
+        return OpenAIEmbeddings(api_key=api_key, chunk_size=2048, **kwargs)
     else:
         raise ValueError(
             f"Unknown embedding provider: {s.embedding_provider}. "
             "Use 'huggingface' or 'openai'."
         )
+
+
+def embed_batch(texts: list[str]) -> list[list[float]]:
+    """Embed ``texts`` in one provider call, embedding each distinct text once.
+
+    Repeated chunks (page headers/footers, boilerplate clauses) are common in
+    policy PDFs; their vectors are computed once and shared.
+    """
+    index: dict[str, int] = {}
+    inverse = [index.setdefault(t, len(index)) for t in texts]
+    vectors = get_embeddings().embed_documents(list(index))
+    return [vectors[i] for i in inverse]
@@ -1,11 +1,14 @@
 """LLM client for answers and summaries (OpenAI-compatible API)."""
+from functools import lru_cache
+
 from langchain_openai import ChatOpenAI
 
 from app.config import get_settings
 
 
+@lru_cache(maxsize=1)
 def get_llm():
-    """Create LLM from settings."""
+    """Create LLM from settings (cached, so the HTTP connection pool is reused)."""
     s = get_settings()
     kwargs = {"model": s.llm_model, "temperature": 0}
     if s.base_url:
@@ -3,26 +3,53 @@
 Endpoints:
   POST /upload              Upload + index a document; triggers section detection.
   POST /ask                 Grounded Q&A with confidence + gap detection.
+  POST /ask/stream          Same as /ask, streamed as server-sent events.
+  POST /ask_batch           Several /ask questions with shared retrieval.
   POST /analyze_scenario    AI compliance advisor for workplace scenarios.
   GET  /sections            Return auto-detected section summaries.
   POST /compare_documents   Semantic diff between two uploaded documents.
   POST /summarize           Summarize a raw text section.
   GET  /health              Health check.
 """
-import uuid
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+import orjson
 from pydantic import BaseModel
 
 from app.config import get_settings
 from app.document import load_document, chunk_documents
-from app.vector_store import add_documents_to_store
-from app.rag import answer_question, analyze_scenario, summarize_section
+from app.embeddings import get_embeddings
+from app.vector_store import add_documents_to_store_async
+from app.rag import (
+    Source,
+    aanswer_question,
+    analyze_scenario,
+    answer_question_stream,
+    answer_questions_batch,
+    clear_answer_memo,
+    summarize_section,
+)
+from app.answer_cache import cache_answer, clear_answer_cache, get_cached_answer
 from app.classifier import classify_query
+from app.diff import compare_documents
+from app.llm import get_llm
+from app.sections import cache_sections, detect_sections, load_all_sections, summarize_sections
+from app.table_parser import extract_tables_from_pdf
+from app.upload_registry import lookup_upload, record_upload
 
 
 app = FastAPI(
@@ -34,17 +61,67 @@ app = FastAPI(
     version="1.0.0",
 )
 
-# CORS for frontend
+# CORS for frontend: explicit origins/methods/headers keep Starlette on its
+# fast path, and a one-day max_age lets browsers cache preflight responses.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=get_settings().cors_origins,
+    allow_methods=["GET", "POST"],
+    allow_headers=["content-type"],
+    max_age=86400,
 )
 
 _FRONTEND_DIR = Path(__file__).resolve().parent.parent.parent / "frontend"
 
+# PDF parsing, chunking and table extraction are CPU-bound; run them in worker
+# processes so uploads use several cores and never block the event loop.
+# Speed-up plateaus around 4 workers for pdfplumber/pypdf.  Workers start on
+# the first upload, after torch, the embedding model and several threads are
+# live, so they come from a forkserver rather than a fork of this process.
+_PDF_POOL = ProcessPoolExecutor(
+    max_workers=min(os.cpu_count() or 1, 4),
+    mp_context=multiprocessing.get_context("forkserver"),
+)
+
+
+@app.on_event("shutdown")
+def _shutdown_pdf_pool() -> None:
+    _PDF_POOL.shutdown(wait=False, cancel_futures=True)
+
+
+# Resolved once at startup so hot request paths skip the stat/mkdir syscalls.
+_INDEX_PATH: Path | None = None
+_INDEX_STAT: os.stat_result | None = None
+_UPLOADS_DIR: Path | None = None
+
+
+@app.on_event("startup")
+def _resolve_paths() -> None:
+    global _INDEX_PATH, _INDEX_STAT, _UPLOADS_DIR
+    index = _FRONTEND_DIR / "index.html"
+    _INDEX_PATH = index if index.exists() else None
+    # Reused by root() so FileResponse skips its own stat() on every request.
+    _INDEX_STAT = index.stat() if _INDEX_PATH is not None else None
+    _UPLOADS_DIR = get_settings().data_dir / "uploads"
+    _UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def _warm_up_models() -> None:
+    """Build the LLM client and load the embedding model before first use."""
+    get_llm()
+    get_embeddings().embed_query("warm-up")
+
+
+@app.on_event("startup")
+async def _warm_up() -> None:
+    # The first /ask would otherwise pay for model loading.  A failure here
+    # (e.g. missing API key) is reported by the first real request instead.
+    try:
+        await run_in_threadpool(_warm_up_models)
+    except Exception:
+        pass
+
+
 # ---------------------------------------------------------------------------
 # Routes defined BEFORE static mount so they take priority
 # ---------------------------------------------------------------------------
@@ -52,30 +129,93 @@ _FRONTEND_DIR = Path(__file__).resolve().parent.parent.parent / "frontend"
 @app.get("/")
 async def root():
     """Serve the frontend UI at the root path."""
-    index = _FRONTEND_DIR / "index.html"
-    if index.exists():
-        return FileResponse(str(index))
+    if _INDEX_PATH is not None:
+        return FileResponse(_INDEX_PATH, stat_result=_INDEX_STAT)
     return {"service": "PolicyAssist", "docs": "/docs", "health": "/health"}
 
 
 COLLECTION_NAME = "policy_docs"
 ALLOWED_EXTENSIONS = {".pdf", ".txt"}
+UPLOAD_CHUNK_BYTES = 1 << 20   # stream uploads to disk 1 MiB at a time
+MAX_BATCH_QUESTIONS = 20       # questions accepted per /ask_batch call
+
+
+# Unhandled errors are logged through a queue so request handlers never
+# block on log I/O; the listener thread does the actual writing.
+logger = logging.getLogger("policyassist")
+logger.propagate = False
+_LOG_QUEUE: queue.SimpleQueue = queue.SimpleQueue()
+logger.addHandler(QueueHandler(_LOG_QUEUE))
+_LOG_LISTENER = QueueListener(_LOG_QUEUE, logging.StreamHandler())
+
+
+@app.on_event("startup")
+def _start_log_listener() -> None:
+    _LOG_LISTENER.start()
+
+
+@app.on_event("shutdown")
+def _stop_log_listener() -> None:
+    _LOG_LISTENER.stop()
+
+
+_ERR_TEMPLATE = b'{"detail":%b,"error":%b}'
 
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Ensure all errors return JSON so the frontend can parse them."""
-    return JSONResponse(
-        status_code=500,
-        content={"detail": str(exc), "error": str(exc)},
-    )
+    logger.error("Unhandled error on %s %s", request.method, request.url.path, exc_info=exc)
+    msg = orjson.dumps(str(exc))
+    return Response(_ERR_TEMPLATE % (msg, msg), status_code=500, media_type="application/json")
 
 
 def get_uploads_dir() -> Path:
-    s = get_settings()
-    d = s.data_dir / "uploads"
-    d.mkdir(parents=True, exist_ok=True)
-    return d
+    if _UPLOADS_DIR is None:   # app used without running startup events
+        _resolve_paths()
+    return _UPLOADS_DIR
+
+
+def _detect_and_cache_sections(docs, file_id: str) -> int:
+    """Detect sections, summarise them with the LLM and cache to disk.
+
+    Returns the number of sections cached (0 on any failure).
+    """
+    try:
+        sections = detect_sections(docs)
+        if not sections:
+            return 0
+        summarized = summarize_sections(sections, get_llm())
+        cache_sections(summarized, file_id)
+        return len(summarized)
+    except Exception:
+        return 0
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+async def _save_upload(file: UploadFile, path: Path) -> str:
+    """Stream an upload to ``path`` without holding the whole file in memory.
+
+    Disk writes run in the threadpool so the event loop keeps serving other
+    requests while large PDFs are saved.  Returns the SHA-256 hex digest of
+    the content, hashed block by block as it is written.
+    """
+    digest = hashlib.sha256()
+    # Raw fd writes with no fsync: the upload is re-sendable and a partial
+    # file is discarded on failure, so durability isn't worth the journal I/O.
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            digest.update(chunk)
+            await run_in_threadpool(_write_all, fd, chunk)
+    finally:
+        os.close(fd)
+    return digest.hexdigest()
 
 
 # ---------------------------------------------------------------------------
@@ -86,12 +226,21 @@ class AskRequest(BaseModel):
     question: str
 
 
+class AskBatchRequest(BaseModel):
+    questions: list[str]
+
+
 class SourceCitation(BaseModel):
     """A single citation grounded in a retrieved document chunk."""
     page: int
     excerpt: str
 
 
+def _citations(sources: list[Source]) -> list[SourceCitation]:
+    # Sources are built server-side from chunk metadata, so skip validation.
+    return [SourceCitation.model_construct(page=s.page, excerpt=s.excerpt) for s in sources]
+
+
 class AskResponse(BaseModel):
     """Structured answer with confidence, citations, and gap detection."""
     answer: str
@@ -185,55 +334,70 @@ async def upload_document(
             detail=f"Allowed types: {', '.join(ALLOWED_EXTENSIONS)}. Got: {suffix or 'unknown'}",
         )
 
-    file_id = str(uuid.uuid4())
+    file_id = secrets.token_hex(16)
     uploads_dir = get_uploads_dir()
     path = uploads_dir / f"{file_id}{suffix}"
 
     try:
-        contents = await file.read()
-        path.write_bytes(contents)
+        content_hash = await _save_upload(file, path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {e}") from e
 
+    # Identical bytes already ingested into this collection: skip the work.
+    previous = await run_in_threadpool(lookup_upload, content_hash, collection_name)
+    if previous is not None:
+        path.unlink(missing_ok=True)
+        return UploadResponse(message="Document already indexed; reusing previous ingestion.", **previous)
+
     try:
-        docs = load_document(path)
+        loop = asyncio.get_running_loop()
+        docs = await loop.run_in_executor(_PDF_POOL, load_document, path)
         if not docs:
             raise HTTPException(status_code=400, detail="Document could not be parsed or is empty.")
 
-        chunks = chunk_documents(docs)
-        add_documents_to_store(chunks, collection_name=collection_name)
+        settings = get_settings()
+
+        # Chunking and (PDF-only, policy_docs-only) table extraction are
+        # independent, so run them side by side in the pool.  Table
+        # extraction fans its pages out over the pool from a thread.
+        chunk_job = loop.run_in_executor(_PDF_POOL, chunk_documents, docs)
+        if settings.enable_tables and suffix == ".pdf" and collection_name == COLLECTION_NAME:
+            chunks, table_docs = await asyncio.gather(
+                chunk_job, run_in_threadpool(extract_tables_from_pdf, path, _PDF_POOL)
+            )
+        else:
+            chunks, table_docs = await chunk_job, []
+        tables_ingested = len(table_docs)
 
-        # --- Table extraction (PDF only) – only for policy_docs uploads ---
-        tables_ingested = 0
-        if suffix == ".pdf" and collection_name == COLLECTION_NAME:
-            from app.table_parser import extract_tables_from_pdf
-            table_docs = extract_tables_from_pdf(path)
-            if table_docs:
-                add_documents_to_store(table_docs, collection_name=collection_name)
-                tables_ingested = len(table_docs)
+        # Text and table chunks are embedded in one batch; the store splits
+        # the writes to fit Chroma's per-call limit.
+        await add_documents_to_store_async(chunks + table_docs, collection_name=collection_name)
 
         # --- Section detection + caching (only for normal policy uploads) ---
+        # LLM-bound, so a thread is enough.
         sections_detected = 0
         if collection_name == COLLECTION_NAME:
-            try:
-                from app.sections import detect_sections, summarize_sections, cache_sections
-                from app.llm import get_llm
-                sections = detect_sections(docs)
-                if sections:
-                    summarized = summarize_sections(sections, get_llm())
-                    cache_sections(summarized, file_id)
-                    sections_detected = len(summarized)
-            except Exception:
-                pass
-
+            await run_in_threadpool(clear_answer_cache)   # new policy content can change any answer
+            clear_answer_memo()
+            if settings.enable_sections:
+                sections_detected = await run_in_threadpool(_detect_and_cache_sections, docs, file_id)
+
+        filename = file.filename or path.name
+        await run_in_threadpool(
+            record_upload,
+            content_hash, collection_name, file_id, filename,
+            len(chunks), tables_ingested, sections_detected,
+        )
         return UploadResponse(
             message="Document uploaded, indexed, and analyzed successfully.",
             file_id=file_id,
-            filename=file.filename or path.name,
+            filename=filename,
             chunks_ingested=len(chunks),
             tables_ingested=tables_ingested,
             sections_detected=sections_detected,
         )
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
@@ -263,23 +427,109 @@ async def ask(req: AskRequest):
     if not req.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty.")
 
+    # Chroma calls are blocking; they run in worker threads (the LLM call is
+    # awaited natively) so concurrent /ask calls overlap on the event loop.
+    # Near-duplicate of a recently answered question: skip retrieval + LLM.
+    cached = await run_in_threadpool(get_cached_answer, req.question)
+    if cached is not None:
+        sources = [SourceCitation.model_construct(**s) for s in cached["sources"]]
+        return AskResponse.model_construct(**{**cached, "sources": sources})
+
     # Classify query to pick optimal retrieval strategy
     query_class = classify_query(req.question)
 
-    result = answer_question(
+    result = await aanswer_question(
         req.question,
         collection_name=COLLECTION_NAME,
         top_k=query_class.top_k,
         query_label=query_class.label,
     )
-    return AskResponse(
+    response = AskResponse.model_construct(
         answer=result["answer"],
         confidence=result["confidence"],
-        sources=[SourceCitation(**s) for s in result["sources"]],
+        sources=_citations(result["sources"]),
         gap_detected=result["gap_detected"],
         suggestion=result.get("suggestion"),
         query_type=query_class.label,
     )
+    await run_in_threadpool(cache_answer, req.question, response.model_dump())
+    return response
+
+
+@app.post("/ask_batch", response_model=list[AskResponse])
+async def ask_batch(req: AskBatchRequest):
+    """Answer several questions in one call (same per-item shape as POST /ask).
+
+    All questions are embedded together and retrieved with one multi-query
+    search; the LLM calls run concurrently.
+    """
+    if not req.questions:
+        raise HTTPException(status_code=400, detail="questions cannot be empty.")
+    if len(req.questions) > MAX_BATCH_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_QUESTIONS} questions per batch.",
+        )
+    if any(not q.strip() for q in req.questions):
+        raise HTTPException(status_code=400, detail="Question cannot be empty.")
+
+    classes = [classify_query(q) for q in req.questions]
+    results = await run_in_threadpool(
+        answer_questions_batch,
+        req.questions,
+        [c.top_k for c in classes],
+        [c.label for c in classes],
+        collection_name=COLLECTION_NAME,
+    )
+    return [
+        AskResponse.model_construct(
+            answer=result["answer"],
+            confidence=result["confidence"],
+            sources=_citations(result["sources"]),
+            gap_detected=result["gap_detected"],
+            suggestion=result.get("suggestion"),
+            query_type=c.label,
+        )
+        for result, c in zip(results, classes)
+    ]
+
+
+@app.post("/ask/stream")
+async def ask_stream(req: AskRequest):
+    """Streaming variant of POST /ask using server-sent events.
+
+    Emits ``{"type": "token", "data": "..."}`` events as the answer is
+    generated, then one ``{"type": "final", ...}`` event with the same fields
+    as the /ask response.  Retrieval runs once before streaming begins.
+    """
+    if not req.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty.")
+
+    cached = await run_in_threadpool(get_cached_answer, req.question)
+    query_class = classify_query(req.question)
+
+    # A sync generator: Starlette iterates it in the threadpool, so blocking
+    # retrieval and LLM streaming stay off the event loop.
+    def events():
+        if cached is not None:
+            yield b"data: " + orjson.dumps({"type": "final", **cached}) + b"\n\n"
+            return
+        for event in answer_question_stream(
+            req.question,
+            collection_name=COLLECTION_NAME,
+            top_k=query_class.top_k,
+            query_label=query_class.label,
+        ):
+            if event["type"] == "final":
+                event["query_type"] = query_class.label
+                cache_answer(req.question, {k: v for k, v in event.items() if k != "type"})
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/analyze_scenario", response_model=ScenarioResponse)
@@ -298,11 +548,11 @@ async def analyze_scenario_endpoint(req: ScenarioRequest):
         raise HTTPException(status_code=400, detail="Scenario cannot be empty.")
 
     result = analyze_scenario(req.scenario, collection_name=COLLECTION_NAME)
-    return ScenarioResponse(
+    return ScenarioResponse.model_construct(
         scenario=result["scenario"],
         outcome=result["outcome"],
         confidence=result["confidence"],
-        sources=[SourceCitation(**s) for s in result["sources"]],
+        sources=_citations(result["sources"]),
         gap_detected=result["gap_detected"],
         suggestion=result.get("suggestion"),
     )
@@ -318,10 +568,9 @@ async def get_sections():
     - **page_range**: e.g. "3-5" — pages spanned by this section.
     """
     try:
-        from app.sections import load_all_sections
-        sections = load_all_sections()
+        sections = await run_in_threadpool(load_all_sections)
         return [
-            SectionInfo(
+            SectionInfo.model_construct(
                 section_name=s["section_name"],
                 summary=s["summary"],
                 page_range=s["page_range"],
@@ -349,14 +598,13 @@ async def compare_documents_endpoint(req: CompareRequest):
         raise HTTPException(status_code=400, detail="collection_a and collection_b must be different.")
 
     try:
-        from app.diff import compare_documents
         result = compare_documents(
             collection_a=req.collection_a.strip(),
             collection_b=req.collection_b.strip(),
         )
         if "error" in result:
             raise HTTPException(status_code=404, detail=result["error"])
-        return CompareResponse(**result)
+        return CompareResponse.model_construct(**result)
     except HTTPException:
         raise
     except Exception as e:
@@ -383,4 +631,4 @@ async def health():
 
 # Mount frontend directory last so API routes always take priority.
 if _FRONTEND_DIR.exists():
-    app.mount("/", StaticFiles(directory=str(_FRONTEND_DIR)), name="frontend")
+    app.mount("/", StaticFiles(directory=str(_FRONTEND_DIR), html=True), name="frontend")
@@ -8,12 +8,31 @@ Design principles:
   - If the LLM cannot find an answer, it returns a fixed refusal string.
   - Gap detection is automatic when a refusal is detected.
 """
+import asyncio
+import copy
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain
+from collections.abc import Iterator
+
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.documents import Document
 
+from app.config import get_settings
 from app.llm import get_llm
-from app.vector_store import search_similar, search_similar_with_scores, search_tables
+from app.embeddings import embed_batch
+from app.vector_store import (
+    search_many_by_vector,
+    search_similar,
+    search_similar_with_scores,
+    search_with_tables,
+)
 
 # ---------------------------------------------------------------------------
 # Strict system prompt — LLM must answer ONLY from the supplied context
@@ -35,12 +54,11 @@ STRICT_SYSTEM_PROMPT = (
     "CONTEXT:\n{context}"
 )
 
-QA_PROMPT = ChatPromptTemplate.from_messages(
-    [
-        ("system", STRICT_SYSTEM_PROMPT),
-        ("human", "{question}"),
-    ]
-)
+# The QA prompt is static apart from the trailing context, so messages are
+# built by concatenation and sent to the chat model without a prompt template.
+_QA_SYSTEM_HEAD, _qa_sep, _qa_tail = STRICT_SYSTEM_PROMPT.partition("{context}")
+if not _qa_sep or _qa_tail or "{" in _QA_SYSTEM_HEAD:
+    raise RuntimeError("STRICT_SYSTEM_PROMPT must end with {context}")
 
 # ---------------------------------------------------------------------------
 # Scenario / Compliance Analyzer prompt
@@ -83,6 +101,8 @@ SUMMARIZE_PROMPT = ChatPromptTemplate.from_messages(
 # Refusal sentinel — returned by the LLM when info is not found
 REFUSAL_TEXT = "The document does not contain this information."
 SCENARIO_REFUSAL_TEXT = "The document does not contain a policy for this scenario."
+_REFUSAL_PREFIX = REFUSAL_TEXT[:40]
+_SCENARIO_REFUSAL_PREFIX = SCENARIO_REFUSAL_TEXT[:50]
 
 # Gap suggestion template
 _GAP_SUGGESTION = (
@@ -91,10 +111,67 @@ _GAP_SUGGESTION = (
 )
 
 
+# Exact-repeat answer memo: key -> (stored_at, result).  Enabled with
+# POLICYASSIST_CACHE=1; entries live for ANSWER_CACHE_TTL seconds.
+_ANSWER_MEMO: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+_ANSWER_MEMO_MAX = 1024
+_ANSWER_MEMO_LOCK = threading.Lock()
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
+# Chains are composed once and reused, so every request shares the same LLM
+# client and its HTTP connection pool.
+@lru_cache(maxsize=1)
+def _compliance_chain():
+    return COMPLIANCE_PROMPT | get_llm() | StrOutputParser()
+
+
+@lru_cache(maxsize=1)
+def _summarize_chain():
+    return SUMMARIZE_PROMPT | get_llm() | StrOutputParser()
+
+
+def _qa_messages(context: str, question: str) -> list[dict]:
+    return [
+        {"role": "system", "content": _QA_SYSTEM_HEAD + context},
+        {"role": "user", "content": question},
+    ]
+
+
+def _memo_key(question: str, collection_name: str, top_k: int, query_label: str) -> str:
+    raw = "\x1f".join((question.strip().lower(), collection_name, str(top_k), query_label))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _memo_get(key: str) -> dict | None:
+    with _ANSWER_MEMO_LOCK:
+        entry = _ANSWER_MEMO.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > get_settings().answer_cache_ttl:
+            del _ANSWER_MEMO[key]
+            return None
+        _ANSWER_MEMO.move_to_end(key)
+        return copy.deepcopy(entry[1])
+
+
+def _memo_put(key: str, result: dict) -> None:
+    with _ANSWER_MEMO_LOCK:
+        _ANSWER_MEMO[key] = (time.monotonic(), copy.deepcopy(result))
+        _ANSWER_MEMO.move_to_end(key)
+        while len(_ANSWER_MEMO) > _ANSWER_MEMO_MAX:
+            _ANSWER_MEMO.popitem(last=False)
+
+
+def clear_answer_memo() -> None:
+    """Forget memoised answers (call when the indexed documents change)."""
+    with _ANSWER_MEMO_LOCK:
+        _ANSWER_MEMO.clear()
+
+
 def _build_context(docs: list[Document]) -> str:
     """Format retrieved chunks into a page-annotated context string."""
     parts = []
@@ -104,24 +181,55 @@ def _build_context(docs: list[Document]) -> str:
     return "\n\n".join(parts)
 
 
+def _starts_with_refusal(text: str, prefix: str) -> bool:
+    """``text.strip().startswith(prefix)`` without copying the whole answer."""
+    i = 0
+    n = len(text)
+    while i < n and text[i].isspace():
+        i += 1
+    return text.startswith(prefix, i)
+
+
+_LINE_BREAK = re.compile("\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+def _join_lines(text: str) -> str:
+    return " ".join([l for l in map(str.strip, text.splitlines()) if l])
+
+
 def _smart_excerpt(text: str, max_len: int = 300) -> str:
     """Extract the most informative excerpt from a chunk.
 
     Skips short leading lines (headings, single chars) and returns first
     substantial prose paragraph trimmed to ``max_len`` characters.
     """
-    lines = [l.strip() for l in text.strip().splitlines()]
     PROSE_MIN_LEN = 35
-    start_idx = 0
-    for i, line in enumerate(lines):
-        if len(line) >= PROSE_MIN_LEN:
-            start_idx = i
+    n = len(text)
+    start = pos = 0
+    # Walk line boundaries lazily, with the same breaks as str.splitlines()
+    # (\r\n, \r, form feeds, ...), until the first prose line.
+    for end, nxt in chain(((m.start(), m.end()) for m in _LINE_BREAK.finditer(text)), ((n, n),)):
+        if end - pos >= PROSE_MIN_LEN and len(text[pos:end].strip()) >= PROSE_MIN_LEN:
+            start = pos
             break
-    excerpt = " ".join(l for l in lines[start_idx:] if l).strip()
-    return excerpt[:max_len] if len(excerpt) > max_len else excerpt
+        pos = nxt
+    # Only the lines that can reach the excerpt are stripped and joined; the
+    # rest of the chunk is used only when the window is mostly blank.
+    stop = start + 2 * max_len
+    excerpt = _join_lines(text[start:stop])
+    if len(excerpt) < max_len and stop < n:
+        excerpt = _join_lines(text[start:])
+    return excerpt[:max_len]
+
+
+@dataclass(slots=True)
+class Source:
+    """A citation built from a retrieved chunk (orjson serialises it as a dict)."""
+    page: int
+    excerpt: str
 
 
-def _build_sources(docs: list[Document]) -> list[dict]:
+def _build_sources(docs: list[Document]) -> list[Source]:
     """Build citation list from retrieved chunk metadata (never from LLM output)."""
     sources = []
     seen_chunk_ids: set[str] = set()
@@ -132,7 +240,7 @@ def _build_sources(docs: list[Document]) -> list[dict]:
         seen_chunk_ids.add(cid)
         page = int(doc.metadata.get("page", 0))
         excerpt = _smart_excerpt(doc.page_content)
-        sources.append({"page": page, "excerpt": excerpt})
+        sources.append(Source(page, excerpt))
     return sources
 
 
@@ -150,8 +258,8 @@ def compute_confidence(docs_with_scores: list[tuple[Document, float]]) -> str:
     """
     if not docs_with_scores:
         return "Low"
-    scores = [score for _, score in docs_with_scores]
-    top_score = max(scores)
+    # k is at most ~10 here: a plain max() beats converting to a NumPy array.
+    top_score = max(score for _, score in docs_with_scores)
     if top_score >= 0.75:
         return "High"
     if top_score >= 0.50:
@@ -163,6 +271,83 @@ def compute_confidence(docs_with_scores: list[tuple[Document, float]]) -> str:
 # Core RAG functions
 # ---------------------------------------------------------------------------
 
+def _retrieve_for_question(
+    question: str,
+    collection_name: str,
+    top_k: int,
+    query_label: str,
+) -> list[tuple[Document, float]]:
+    """Run the retrieval step of answer_question (table-aware for numeric queries)."""
+    # For numeric queries, also include table-specific chunks
+    if query_label == "numeric_lookup":
+        docs_with_scores, table_docs = search_with_tables(question, k=top_k, collection_name=collection_name)
+        return _merge_tables(docs_with_scores, table_docs)
+    return search_similar_with_scores(question, k=top_k, collection_name=collection_name)
+
+
+def _merge_tables(
+    docs_with_scores: list[tuple[Document, float]],
+    table_docs: list[Document],
+) -> list[tuple[Document, float]]:
+    """Merge: prepend table docs with an artificial high score so they rank first."""
+    existing_ids = {d.metadata.get("chunk_id") for d, _ in docs_with_scores}
+    extra = [d for d in table_docs if d.metadata.get("chunk_id") not in existing_ids]
+    return [(d, 0.9) for d in extra] + docs_with_scores
+
+
+def _no_content_result() -> dict:
+    return {
+        "answer": (
+            "No relevant content was found in the uploaded documents. "
+            "Please upload policy documents first or rephrase your question."
+        ),
+        "confidence": "Low",
+        "sources": [],
+        "gap_detected": True,
+        "suggestion": "Please upload relevant policy documents before querying.",
+    }
+
+
+def _refusal_result() -> dict:
+    return {
+        "answer": REFUSAL_TEXT,
+        "confidence": "Low",
+        "sources": [],
+        "gap_detected": True,
+        "suggestion": _GAP_SUGGESTION,
+    }
+
+
+def _too_weak_to_answer(docs_with_scores: list[tuple[Document, float]]) -> bool:
+    """True when even the best chunk is too weak a match to be worth an LLM call."""
+    floor = get_settings().min_answer_score
+    return floor > 0 and max(score for _, score in docs_with_scores) < floor
+
+
+def _answer_result(
+    answer: str,
+    docs_with_scores: list[tuple[Document, float]],
+    sources: list[Source] | None = None,
+) -> dict:
+    """Turn the raw LLM answer into the structured answer_question result.
+
+    ``sources`` may be passed in when they were built ahead of time.
+    """
+    # If LLM returned a refusal → gap detected
+    if _starts_with_refusal(answer, _REFUSAL_PREFIX):
+        return _refusal_result()
+
+    if sources is None:
+        sources = _build_sources([d for d, _ in docs_with_scores])
+    return {
+        "answer": answer.strip(),
+        "confidence": compute_confidence(docs_with_scores),
+        "sources": sources,
+        "gap_detected": False,
+        "suggestion": None,
+    }
+
+
 def answer_question(
     question: str,
     collection_name: str = "policy_docs",
@@ -175,62 +360,164 @@ def answer_question(
         {
             "answer": "<LLM answer string>",
             "confidence": "High | Medium | Low",
-            "sources": [{"page": 3, "excerpt": "..."}],
+            "sources": [Source(page=3, excerpt="...")],
             "gap_detected": bool,
             "suggestion": str | None,
         }
     """
-    # For numeric queries, also include table-specific chunks
-    if query_label == "numeric_lookup":
-        table_docs = search_tables(question, k=top_k, collection_name=collection_name)
-        docs_with_scores = search_similar_with_scores(question, k=top_k, collection_name=collection_name)
-        # Merge: prepend table docs with an artificial high score so they rank first
-        all_docs = [d for d, _ in docs_with_scores]
-        table_ids = {d.metadata.get("chunk_id") for d in table_docs}
-        extra = [d for d in table_docs if d.metadata.get("chunk_id") not in
-                 {dd.metadata.get("chunk_id") for dd in all_docs}]
-        docs_with_scores = [(d, 0.9) for d in extra] + docs_with_scores
-    else:
-        docs_with_scores = search_similar_with_scores(question, k=top_k, collection_name=collection_name)
-        all_docs = [d for d, _ in docs_with_scores]
-
-    all_docs = [d for d, _ in docs_with_scores]
-
-    if not all_docs:
-        return {
-            "answer": (
-                "No relevant content was found in the uploaded documents. "
-                "Please upload policy documents first or rephrase your question."
-            ),
-            "confidence": "Low",
-            "sources": [],
-            "gap_detected": True,
-            "suggestion": "Please upload relevant policy documents before querying.",
-        }
+    memo = get_settings().policyassist_cache
+    if memo:
+        key = _memo_key(question, collection_name, top_k, query_label)
+        cached = _memo_get(key)
+        if cached is not None:
+            return cached
+
+    docs_with_scores = _retrieve_for_question(question, collection_name, top_k, query_label)
+    if not docs_with_scores:
+        return _no_content_result()
+    if _too_weak_to_answer(docs_with_scores):
+        return _refusal_result()
 
-    confidence = compute_confidence(docs_with_scores)
-    context = _build_context(all_docs)
-    chain = QA_PROMPT | get_llm() | StrOutputParser()
-    answer = chain.invoke({"context": context, "question": question})
+    context = _build_context([d for d, _ in docs_with_scores])
+    answer = get_llm().invoke(_qa_messages(context, question)).content
+    result = _answer_result(answer, docs_with_scores)
+    if memo:
+        _memo_put(key, result)
+    return result
 
-    # If LLM returned a refusal → gap detected
-    if answer.strip().startswith(REFUSAL_TEXT[:40]):
-        return {
-            "answer": REFUSAL_TEXT,
-            "confidence": "Low",
-            "sources": [],
-            "gap_detected": True,
-            "suggestion": _GAP_SUGGESTION,
-        }
 
-    sources = _build_sources(all_docs)
-    return {
-        "answer": answer.strip(),
-        "confidence": confidence,
-        "sources": sources,
-        "gap_detected": False,
-        "suggestion": None,
-    }
+async def aanswer_question(
+    question: str,
+    collection_name: str = "policy_docs",
+    top_k: int = 5,
+    query_label: str = "factual_lookup",
+) -> dict:
+    """Async variant of :func:`answer_question`; same result shape.
+
+    Retrieval runs in a worker thread.  Citations depend only on the
+    retrieved chunks, so they are built concurrently with the LLM call
+    instead of after it.
+    """
+    memo = get_settings().policyassist_cache
+    if memo:
+        key = _memo_key(question, collection_name, top_k, query_label)
+        cached = _memo_get(key)
+        if cached is not None:
+            return cached
+
+    docs_with_scores = await asyncio.to_thread(
+        _retrieve_for_question, question, collection_name, top_k, query_label
+    )
+    if not docs_with_scores:
+        return _no_content_result()
+    if _too_weak_to_answer(docs_with_scores):
+        return _refusal_result()
+
+    docs = [d for d, _ in docs_with_scores]
+    message, sources = await asyncio.gather(
+        get_llm().ainvoke(_qa_messages(_build_context(docs), question)),
+        asyncio.to_thread(_build_sources, docs),
+    )
+    answer = message.content
+    result = _answer_result(answer, docs_with_scores, sources)
+    if memo:
+        _memo_put(key, result)
+    return result
+
+
+def answer_questions_batch(
+    questions: list[str],
+    top_ks: list[int],
+    query_labels: list[str],
+    collection_name: str = "policy_docs",
+) -> list[dict]:
+    """Answer several questions with shared retrieval and concurrent LLM calls.
+
+    Equivalent to calling :func:`answer_question` per question, but all
+    questions are embedded in one call, retrieved with one multi-query
+    search (plus one table-filtered search for numeric questions), and sent
+    to the LLM concurrently.
+    """
+    if not questions:
+        return []
+    vectors = embed_batch([q.strip() for q in questions])
+    hits = search_many_by_vector(vectors, k=max(top_ks), collection_name=collection_name)
+    retrieved = [h[:k] for h, k in zip(hits, top_ks)]
+
+    numeric = [i for i, label in enumerate(query_labels) if label == "numeric_lookup"]
+    if numeric:
+        table_hits = search_many_by_vector(
+            [vectors[i] for i in numeric],
+            k=max(top_ks[i] for i in numeric),
+            collection_name=collection_name,
+            filter={"is_table": True},
+        )
+        for i, tables in zip(numeric, table_hits):
+            retrieved[i] = _merge_tables(retrieved[i], [d for d, _ in tables[:top_ks[i]]])
+
+    results: list[dict | None] = [None] * len(questions)
+    pending = []
+    for i, docs_with_scores in enumerate(retrieved):
+        if not docs_with_scores:
+            results[i] = _no_content_result()
+        elif _too_weak_to_answer(docs_with_scores):
+            results[i] = _refusal_result()
+        else:
+            pending.append(i)
+    messages = get_llm().batch([
+        _qa_messages(_build_context([d for d, _ in retrieved[i]]), questions[i])
+        for i in pending
+    ])
+    for i, message in zip(pending, messages):
+        results[i] = _answer_result(message.content, retrieved[i])
+    return results
+
+
+def answer_question_stream(
+    question: str,
+    collection_name: str = "policy_docs",
+    top_k: int = 5,
+    query_label: str = "factual_lookup",
+) -> Iterator[dict]:
+    """Streaming variant of :func:`answer_question`.
+
+    Retrieval runs once up front; only the LLM output is streamed.  Yields
+    ``{"type": "token", "data": str}`` events as the answer is generated,
+    then a single ``{"type": "final", ...}`` event carrying the same fields
+    ``answer_question`` returns.  A refusal is recognised from its first
+    characters, in which case no tokens are emitted and generation stops.
+    """
+    docs_with_scores = _retrieve_for_question(question, collection_name, top_k, query_label)
+    if not docs_with_scores:
+        yield {"type": "final", **_no_content_result()}
+        return
+    if _too_weak_to_answer(docs_with_scores):
+        yield {"type": "final", **_refusal_result()}
+        return
+
+    context = _build_context([d for d, _ in docs_with_scores])
+    prefix = _REFUSAL_PREFIX
+    parts = []
+    head = ""
+    undecided = True
+    for chunk in get_llm().stream(_qa_messages(context, question)):
+        token = chunk.content
+        parts.append(token)
+        if undecided:
+            # Hold tokens back until the first ~40 chars show whether this is
+            # the refusal; if so, stop generating and skip source assembly.
+            head = (head + token).lstrip()
+            if len(head) < len(prefix) and prefix.startswith(head):
+                continue
+            if head.startswith(prefix):
+                yield {"type": "final", **_answer_result(REFUSAL_TEXT, docs_with_scores)}
+                return
+            undecided = False
+            token = "".join(parts)
+        yield {"type": "token", "data": token}
+    if undecided and parts:
+        yield {"type": "token", "data": "".join(parts)}
+    yield {"type": "final", **_answer_result("".join(parts), docs_with_scores)}
 
 
 def analyze_scenario(
@@ -245,7 +532,7 @@ def analyze_scenario(
             "scenario": "...",
             "outcome": "LLM reasoning text",
             "confidence": "High | Medium | Low",
-            "sources": [{"page": int, "excerpt": str}],
+            "sources": [Source(page, excerpt)],
             "gap_detected": bool,
             "suggestion": str | None,
         }
@@ -265,10 +552,9 @@ def analyze_scenario(
 
     confidence = compute_confidence(docs_with_scores)
     context = _build_context(docs)
-    chain = COMPLIANCE_PROMPT | get_llm() | StrOutputParser()
-    outcome = chain.invoke({"context": context, "scenario": scenario})
+    outcome = _compliance_chain().invoke({"context": context, "scenario": scenario})
 
-    if outcome.strip().startswith(SCENARIO_REFUSAL_TEXT[:50]):
+    if _starts_with_refusal(outcome, _SCENARIO_REFUSAL_PREFIX):
         return {
             "scenario": scenario,
             "outcome": SCENARIO_REFUSAL_TEXT,
@@ -293,5 +579,4 @@ def summarize_section(section_text: str) -> str:
     """Summarize a document section (e.g. leave policy, attendance rules)."""
     if not section_text.strip():
         return "No content to summarize."
-    chain = SUMMARIZE_PROMPT | get_llm() | StrOutputParser()
-    return chain.invoke({"context": section_text})
+    return _summarize_chain().invoke({"context": section_text})
@@ -0,0 +1,154 @@
+"""Semantic cache for vector-store retrieval results.
+
+A query whose embedding is within ``threshold`` cosine similarity of a
+recently searched one reuses that search's hits instead of traversing the
+HNSW index again.  Each entry keeps the top ``CACHE_TOP_K`` hits, so a later
+query asking for fewer results is served by slicing.
+
+Key vectors live in one preallocated ``(capacity, d)`` array of unit vectors:
+a lookup is a single matrix-vector product.  Unused rows stay zero and can
+never reach the threshold.
+
+Query traffic is heavy-tailed (a few FAQ-like questions dominate), so
+eviction is least-frequently-used rather than least-recently-used: a popular
+query is not pushed out by a burst of one-off ones.  Entries expire after
+``ttl`` seconds, which also retires once-popular queries; expired slots are
+reused first.
+
+Past ``lsh_min_entries`` entries (default ``LSH_MIN_ENTRIES``) the full scan
+starts to cost more than it saves, so each key also gets a ``LSH_BITS``-bit random-hyperplane signature
+and lookups only score keys whose signature is within one bit of the
+query's.  At the default 0.97 threshold a matching key lands there about
+nine times in ten; a miss just means one extra vector search.  Below a few
+thousand entries the exact scan is cheap enough that this trade is not
+worth it, so the default 1024-entry cache never buckets.
+"""
+import threading
+import time
+
+import numpy as np
+
+CACHE_TOP_K = 10   # hits stored per entry (searches fetch max(k, CACHE_TOP_K))
+LSH_BITS = 16
+LSH_MIN_ENTRIES = 4096   # default size at which lookups switch to buckets
+_BIT_VALUES = 1 << np.arange(LSH_BITS)
+_NEIGHBOUR_MASKS = (0, *(1 << b for b in range(LSH_BITS)))   # Hamming distance <= 1
+
+
+def _unit(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
+
+
+class SemanticCache:
+    """Fixed-capacity similarity-keyed cache of ``(Document, score)`` hit lists."""
+
+    def __init__(
+        self,
+        capacity: int,
+        threshold: float,
+        ttl: float = 0,
+        lsh_min_entries: int = LSH_MIN_ENTRIES,
+    ):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl   # seconds; 0 = entries never expire
+        self.lsh_min_entries = lsh_min_entries   # 0 = always bucket
+        self._lock = threading.Lock()
+        self._keys: np.ndarray | None = None
+        self._size = 0   # slots [0, _size) are in use
+        # Per slot: (k fetched, hits), hit count and insertion time.
+        self._entries: list[tuple[int, list] | None] = [None] * capacity
+        self._freq = np.zeros(capacity, dtype=np.int64)
+        self._born = np.zeros(capacity, dtype=np.float64)
+        self._planes: np.ndarray | None = None   # (d, LSH_BITS) hyperplane normals
+        self._sigs = np.zeros(capacity, dtype=np.int64)
+        self._buckets: dict[int, set[int]] = {}   # signature -> slots
+
+    def _signature(self, q: np.ndarray) -> int:
+        return int(_BIT_VALUES[(q @ self._planes) > 0].sum())
+
+    def _candidates(self, q: np.ndarray) -> np.ndarray | None:
+        """Slots in buckets next to ``q``'s, or None to scan every slot."""
+        if self._size < self.lsh_min_entries:
+            return None
+        sig = self._signature(q)
+        slots = set()
+        for mask in _NEIGHBOUR_MASKS:
+            slots.update(self._buckets.get(sig ^ mask, ()))
+        return np.fromiter(slots, dtype=np.int64, count=len(slots))
+
+    def _expired(self, now: float) -> np.ndarray | None:
+        """Mask of expired slots among those in use, or None without a TTL."""
+        if self.ttl <= 0:
+            return None
+        return self._born[:self._size] < now - self.ttl
+
+    def get(self, vector, k: int) -> list | None:
+        """Return the first ``k`` cached hits for a near-identical query, or None."""
+        q = _unit(vector)
+        with self._lock:
+            if not self._size or self._keys.shape[1] != q.shape[0]:
+                return None
+            slots = self._candidates(q)
+            if slots is not None and not len(slots):
+                return None
+            sims = self._keys[:self._size] @ q if slots is None else self._keys[slots] @ q
+            expired = self._expired(time.monotonic())
+            if expired is not None and slots is not None:
+                expired = expired[slots]
+            if expired is not None:
+                sims[expired] = -1.0
+            best = int(sims.argmax())
+            if sims[best] < self.threshold:
+                return None
+            slot = best if slots is None else int(slots[best])
+            fetched, hits = self._entries[slot]
+            if k > fetched and len(hits) == fetched:
+                return None   # the store may hold more than was cached
+            self._freq[slot] += 1
+            return hits[:k]
+
+    def _victim(self, now: float) -> int:
+        """Slot to overwrite: a free one, else the oldest expired, else the LFU."""
+        if self._size < self.capacity:
+            self._size += 1
+            return self._size - 1
+        expired = self._expired(now)
+        if expired is not None and expired.any():
+            return int(self._born.argmin())
+        # Least frequently used; the oldest of those on a tie.
+        candidates = np.flatnonzero(self._freq == self._freq.min())
+        return int(candidates[self._born[candidates].argmin()])
+
+    def put(self, vector, k: int, hits: list) -> None:
+        """Remember ``hits`` (the result of a top-``k`` search) for ``vector``."""
+        q = _unit(vector)
+        now = time.monotonic()
+        with self._lock:
+            if self._keys is None or self._keys.shape[1] != q.shape[0]:
+                self._keys = np.zeros((self.capacity, q.shape[0]), dtype=np.float32)
+                self._planes = np.random.default_rng(0).standard_normal(
+                    (q.shape[0], LSH_BITS)
+                ).astype(np.float32)
+                self._entries = [None] * self.capacity
+                self._buckets.clear()
+                self._size = 0
+            slot = self._victim(now)
+            if self._entries[slot] is not None:
+                self._buckets[int(self._sigs[slot])].discard(slot)
+            sig = self._signature(q)
+            self._sigs[slot] = sig
+            self._buckets.setdefault(sig, set()).add(slot)
+            self._keys[slot] = q
+            self._entries[slot] = (k, hits)
+            self._freq[slot] = 1
+            self._born[slot] = now
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = [None] * self.capacity
+            self._keys = None
+            self._buckets.clear()
+            self._size = 0
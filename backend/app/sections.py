@@ -10,10 +10,11 @@ When a heading is detected every piece of text after it (until the next heading)
 belongs to that section. If no headings are found the whole document becomes
 one section called "Document Overview".
 """
-import json
-import re
+import string
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import orjson
 from langchain_core.documents import Document
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
@@ -37,24 +38,69 @@ SECTION_SUMMARY_PROMPT = ChatPromptTemplate.from_messages(
 )
 
 # ---------------------------------------------------------------------------
-# Heading patterns (applied per line, stripped)
+# Heading tests (applied per line, stripped)
+#
+# Each test is a single linear scan equivalent to the regex noted beside it;
+# no regex engine, and no backtracking on long title-cased prose lines.
 # ---------------------------------------------------------------------------
 
-# 1) Numbered section: "1.", "2.1", "2.1.1", "1.2.3 Title text"
-_NUMBERED_RE = re.compile(r"^\d+(\.\d+)*\.?\s+\S")
+_ASCII_UPPER = frozenset(string.ascii_uppercase)
+_ALLCAPS_BODY = frozenset(string.ascii_uppercase + "-&/,")
+_TITLECASE_STOP = frozenset(".,:;!?")
 
-# 2) ALL CAPS line: at least 2 words, all uppercase letters/spaces/&/-
-_ALLCAPS_RE = re.compile(r"^[A-Z][A-Z\s\-&/,]{4,}[A-Z]$")
 
-# 3) Title Case: ≥ 3 words, each starting with uppercase, no trailing period/comma/semicolon
-_TITLECASE_RE = re.compile(
-    r"^([A-Z][a-zA-Z]{0,}(\s+[A-Z][a-zA-Z]{0,}){2,})[^.,:;!?]*$"
-)
+def _is_numbered(first_word: str) -> bool:
+    """1) Numbered section: "1.", "2.1", "2.1.1", "1.2.3 Title text".
+
+    Same as ``^\d+(\.\d+)*\.?\s+\S`` on a line of two or more words:
+    the number must be the whole first word.
+    """
+    if not first_word[0].isdecimal():
+        return False
+    if first_word[-1] == ".":
+        first_word = first_word[:-1]
+    return (
+        first_word[-1] != "."
+        and ".." not in first_word
+        and first_word.replace(".", "").isdecimal()
+    )
+
+
+def _is_allcaps(line: str) -> bool:
+    """2) ALL CAPS line: uppercase letters plus spaces/&/-/,/ ("LEAVE POLICY").
+
+    Same as ``^[A-Z][A-Z\s\-&/,]{4,}[A-Z]$``.
+    """
+    # isupper() is a cheap necessary condition: every cased char must be A-Z.
+    if len(line) < 6 or not line.isupper():
+        return False
+    if line[0] not in _ASCII_UPPER or line[-1] not in _ASCII_UPPER:
+        return False
+    body = line[1:-1]
+    if body.isascii() and body.replace(" ", "").isalpha():   # common "WORD WORD"
+        return True
+    rest = set(body) - _ALLCAPS_BODY
+    return not rest or "".join(rest).isspace()
+
+
+def _is_titlecase(line: str, words: list[str]) -> bool:
+    """3) Title Case: ≥ 3 words starting uppercase, no . , : ; ! ? anywhere.
+
+    Same as ``^([A-Z][a-zA-Z]{0,}(\s+[A-Z][a-zA-Z]{0,}){2,})[^.,:;!?]*$``:
+    the first two words must be purely alphabetic and the third only has to
+    start with a capital (the regex tail absorbs the rest).
+    """
+    if len(words) < 3:
+        return False
+    w0, w1, w2 = words[0], words[1], words[2]
+    if w0[0] not in _ASCII_UPPER or w1[0] not in _ASCII_UPPER or w2[0] not in _ASCII_UPPER:
+        return False
+    head = w0 + w1
+    return head.isalpha() and head.isascii() and _TITLECASE_STOP.isdisjoint(line)
 
 
 def _is_heading(line: str) -> bool:
-    """Return True if `line` looks like a section heading."""
-    line = line.strip()
+    """Return True if `line` (already stripped) looks like a section heading."""
     # Must be non-empty and not too long
     if not line or len(line) > 80:
         return False
@@ -67,9 +113,9 @@ def _is_heading(line: str) -> bool:
         return False
 
     return (
-        bool(_NUMBERED_RE.match(line))
-        or bool(_ALLCAPS_RE.match(line))
-        or bool(_TITLECASE_RE.match(line))
+        _is_numbered(words[0])
+        or _is_allcaps(line)
+        or _is_titlecase(line, words)
     )
 
 
@@ -94,8 +140,11 @@ def detect_sections(docs: list[Document]) -> list[dict]:
     sections: list[dict] = []
     current: dict | None = None
 
+    # Section text is gathered as a list of lines and joined once when the
+    # section closes; repeated ``str +=`` would copy the text on every line.
     def _save(sec: dict | None):
-        if sec and sec["text"].strip():
+        if sec and sec["text_parts"]:
+            sec["text"] = " ".join(sec.pop("text_parts"))
             sections.append(sec)
 
     for doc in docs:
@@ -109,7 +158,7 @@ def detect_sections(docs: list[Document]) -> list[dict]:
                 _save(current)
                 current = {
                     "section_name": _clean_heading(line),
-                    "text": "",
+                    "text_parts": [],
                     "start_page": page,
                     "end_page": page,
                 }
@@ -117,11 +166,11 @@ def detect_sections(docs: list[Document]) -> list[dict]:
                 if current is None:
                     current = {
                         "section_name": "Introduction / General",
-                        "text": "",
+                        "text_parts": [],
                         "start_page": page,
                         "end_page": page,
                     }
-                current["text"] += " " + line
+                current["text_parts"].append(line)
                 current["end_page"] = page
 
     _save(current)
@@ -150,16 +199,32 @@ def _clean_heading(line: str) -> str:
 # ---------------------------------------------------------------------------
 
 def summarize_sections(sections: list[dict], llm) -> list[dict]:
-    """Generate LLM summaries per section. Skips sections with < 50 chars."""
+    """Generate LLM summaries per section. Skips sections with < 50 chars.
+
+    All summaries are requested concurrently (up to
+    ``summary_max_concurrency`` in flight), so wall time is roughly one LLM
+    round-trip rather than one per section.
+    """
     chain = SECTION_SUMMARY_PROMPT | llm | StrOutputParser()
-    result = []
+    kept = []
+    inputs = []
     for sec in sections:
         text = sec["text"].strip()[:3000]
         if len(text) < 50:
             continue
-        try:
-            summary = chain.invoke({"text": text})
-        except Exception:
+        kept.append(sec)
+        inputs.append({"text": text})
+    if not inputs:
+        return []
+
+    summaries = chain.batch(
+        inputs,
+        config={"max_concurrency": get_settings().summary_max_concurrency},
+        return_exceptions=True,
+    )
+    result = []
+    for sec, summary in zip(kept, summaries):
+        if isinstance(summary, Exception):
             summary = "Summary unavailable."
         result.append(
             {
@@ -181,6 +246,9 @@ def summarize_sections(sections: list[dict], llm) -> list[dict]:
 # Cache helpers
 # ---------------------------------------------------------------------------
 
+LOAD_MAX_WORKERS = 16
+
+
 def _sections_dir() -> Path:
     d = get_settings().data_dir / "sections"
     d.mkdir(parents=True, exist_ok=True)
@@ -190,16 +258,24 @@ def _sections_dir() -> Path:
 def cache_sections(sections_data: list[dict], file_id: str) -> None:
     """Persist section data to  data/sections/<file_id>.json."""
     path = _sections_dir() / f"{file_id}.json"
-    path.write_text(json.dumps(sections_data, indent=2), encoding="utf-8")
+    path.write_bytes(orjson.dumps(sections_data))
+
+
+def _read_sections_file(path: Path) -> list[dict]:
+    try:
+        return orjson.loads(path.read_bytes())
+    except Exception:
+        return []
 
 
 def load_all_sections() -> list[dict]:
     """Load and merge all cached section JSON files."""
+    files = sorted(_sections_dir().glob("*.json"))
+    if len(files) <= 1:
+        return [s for f in files for s in _read_sections_file(f)]
     all_sections: list[dict] = []
-    for f in sorted(_sections_dir().glob("*.json")):
-        try:
-            data = json.loads(f.read_text(encoding="utf-8"))
+    # File reads are I/O-bound; map() keeps the sorted file order.
+    with ThreadPoolExecutor(max_workers=min(LOAD_MAX_WORKERS, len(files))) as pool:
+        for data in pool.map(_read_sections_file, files):
             all_sections.extend(data)
-        except Exception:
-            continue
     return all_sections
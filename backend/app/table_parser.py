@@ -5,46 +5,153 @@ Each table is serialised as a Markdown table string and stored in Chroma
 with metadata  {"is_table": True, "page": <n>}  so numeric-lookup queries
 can filter to table-only chunks for precise answers.
 
+Pages are pre-scanned with pypdfium2 (a pdfplumber dependency, C speed) so
+pdfplumber only parses pages that contain ruling lines.
+
 Install:  pip install pdfplumber
 """
+import multiprocessing
+import os
+from concurrent.futures import Executor
+from functools import lru_cache
+from itertools import chain, repeat
 from pathlib import Path
 
 from langchain_core.documents import Document
 
+try:
+    import pypdfium2 as pdfium  # installed with pdfplumber
+except ImportError:
+    pdfium = None
+
+PAGES_PER_TASK = 4   # pages per worker task when extracting in parallel
+MIN_TABLE_CELLS = 4  # non-empty cells a table needs to be worth a chunk
 
-def _table_to_markdown(table: list[list]) -> str:
-    """Convert a pdfplumber table (list of rows) to a Markdown table string.
+
+def _is_useful_table(table: list[list]) -> bool:
+    """False for the 1-row or mostly-empty "tables" pdfplumber finds in
+    boxes, borders and scanned noise; checked before any stringification.
+    """
+    if len(table) < 2:
+        return False
+    filled = 0
+    for row in table:
+        for cell in row:
+            if cell is not None and str(cell).strip():
+                filled += 1
+                if filled >= MIN_TABLE_CELLS:
+                    return True
+    return False
+
+
+def _markdown_lines(table: list[list] | tuple[tuple, ...]) -> tuple[str, ...]:
+    """Convert a pdfplumber table (list of rows) to Markdown table lines.
 
     pdfplumber returns None for empty cells; we replace with empty string.
+    The caller joins the lines together with the chunk heading, so the
+    table text is copied into a string only once.
     """
     if not table:
-        return ""
+        return ()
+
+    # One pass per row: stringify cells and pad short rows to the header width.
+    header = ["" if cell is None else str(cell) for cell in table[0]]
+    width = len(header)
+    lines = [" | ".join(header), " | ".join(["---"] * width)]
+    for row in table[1:]:
+        cells = ["" if cell is None else str(cell) for cell in row]
+        if len(cells) < width:
+            cells += [""] * (width - len(cells))
+        lines.append(" | ".join(cells))
+
+    return tuple(lines)
+
+
+@lru_cache(maxsize=512)
+def _cached_lines(table: tuple[tuple, ...]) -> tuple[str, ...]:
+    """``_markdown_lines`` memoised on the table's cells.
+
+    Reports often repeat the same header strip or key table on every page;
+    identical tables are serialised once per worker process.
+    """
+    return _markdown_lines(table)
+
 
-    rows = [[str(cell) if cell is not None else "" for cell in row] for row in table]
-    if not rows:
-        return ""
+def _ruled_pages(file_path: Path) -> list[int] | None:
+    """1-based numbers of pages that contain vector paths.
 
-    header = rows[0]
-    body = rows[1:]
+    pdfplumber's default ("lines") table finder builds every table from
+    ruling lines and rectangles, so a page without path objects cannot
+    yield one and need not go through pdfminer at all.
+
+    Returns None (scan every page with pdfplumber) without pypdfium2 or if
+    pdfium cannot read the file.
+    """
+    if pdfium is None:
+        return None
+    try:
+        pdf = pdfium.PdfDocument(str(file_path))
+    except Exception:
+        return None
+    try:
+        ruled = []
+        for i in range(len(pdf)):
+            page = pdf[i]
+            try:
+                if next(page.get_objects(filter=(pdfium.raw.FPDF_PAGEOBJ_PATH,)), None) is not None:
+                    ruled.append(i + 1)
+            finally:
+                page.close()
+        return ruled
+    except Exception:
+        return None
+    finally:
+        pdf.close()
 
-    # Build markdown
-    separator = " | ".join(["---"] * len(header))
-    lines = [
-        " | ".join(header),
-        separator,
-    ]
-    for row in body:
-        # Pad short rows
-        while len(row) < len(header):
-            row.append("")
-        lines.append(" | ".join(row))
 
-    return "\n".join(lines)
+def _page_tables(file_path: Path, page_numbers: list[int] | None = None) -> list[tuple[int, list[str]]]:
+    """Chunk text for every non-empty table on the given 1-based pages (all if None).
 
+    Each string is the ``[TABLE – Page n]`` heading followed by the Markdown.
 
-def extract_tables_from_pdf(file_path: Path) -> list[Document]:
+    Top-level so it can run in a worker process; each call opens the PDF itself.
+    """
+    import pdfplumber
+
+    out = []
+    with pdfplumber.open(str(file_path), pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            heading = f"[TABLE – Page {page.page_number}]"
+            tables = [
+                "\n".join((heading, *lines))
+                for lines in (
+                    _cached_lines(tuple(map(tuple, t))) for t in page.extract_tables() if _is_useful_table(t)
+                )
+                if lines
+            ]
+            out.append((page.page_number, tables))
+            # Drop the page's parsed objects now rather than when the PDF
+            # closes, so peak memory stays at one page's worth.
+            page.close()
+    return out
+
+
+def extract_tables_from_pdf(
+    file_path: Path,
+    executor: Executor | None = None,
+    pages: list[int] | None = None,
+) -> list[Document]:
     """Extract all tables from a PDF and return them as LangChain Documents.
 
+    ``pages`` (1-based) restricts extraction to those pages, e.g. to
+    re-ingest only the pages of a document that changed; pdfplumber never
+    builds the others.
+
+    Only pages with ruling lines are parsed (see ``_ruled_pages``).  With an
+    ``executor`` (a process pool), those pages are split into batches of
+    ``PAGES_PER_TASK`` and extracted in parallel; pdfplumber is CPU-bound
+    and pages are independent.
+
     Each Document has:
         page_content : Markdown-formatted table text
         metadata     : {
@@ -55,7 +162,9 @@ def extract_tables_from_pdf(file_path: Path) -> list[Document]:
             "section_title": "",
         }
 
-    Returns an empty list if pdfplumber is not installed or no tables found.
+    Tables with a single row or fewer than ``MIN_TABLE_CELLS`` non-empty
+    cells are skipped.  Returns an empty list if pdfplumber is not installed
+    or no tables found.
     """
     try:
         import pdfplumber  # optional dependency
@@ -67,27 +176,57 @@ def extract_tables_from_pdf(file_path: Path) -> list[Document]:
     table_index = 0
 
     try:
-        with pdfplumber.open(str(file_path)) as pdf:
-            for page_num, page in enumerate(pdf.pages, start=1):
-                tables = page.extract_tables()
-                for table in tables:
-                    md = _table_to_markdown(table)
-                    if not md.strip():
-                        continue
-                    chunk_id = f"{source}_table_p{page_num}_t{table_index}"
-                    doc = Document(
-                        page_content=f"[TABLE – Page {page_num}]\n{md}",
-                        metadata={
-                            "page": page_num,
-                            "source": source,
-                            "chunk_id": chunk_id,
-                            "is_table": True,
-                            "section_title": "",
-                        },
-                    )
-                    table_docs.append(doc)
-                    table_index += 1
+        wanted = _ruled_pages(file_path)
+        if pages is not None:
+            requested = set(pages)
+            wanted = sorted(requested) if wanted is None else [p for p in wanted if p in requested]
+        if wanted == []:
+            return []
+        page_results = None
+        if executor is not None:
+            if wanted is None:
+                with pdfplumber.open(str(file_path)) as pdf:
+                    wanted = list(range(1, len(pdf.pages) + 1))
+            if len(wanted) > PAGES_PER_TASK:
+                batches = [wanted[i:i + PAGES_PER_TASK] for i in range(0, len(wanted), PAGES_PER_TASK)]
+                # map() yields in submission order, so pages stay sorted.
+                page_results = [
+                    p for batch in executor.map(_page_tables, repeat(file_path), batches) for p in batch
+                ]
+        if page_results is None:
+            page_results = _page_tables(file_path, wanted)
+
+        for page_num, tables in page_results:
+            for content in tables:
+                chunk_id = f"{source}_table_p{page_num}_t{table_index}"
+                doc = Document(
+                    page_content=content,
+                    metadata={
+                        "page": page_num,
+                        "source": source,
+                        "chunk_id": chunk_id,
+                        "is_table": True,
+                        "section_title": "",
+                    },
+                )
+                table_docs.append(doc)
+                table_index += 1
     except Exception:
         return []
 
     return table_docs
+
+
+def extract_tables_from_pdfs(paths: list[Path]) -> list[Document]:
+    """Extract tables from several PDFs, one whole file per worker process.
+
+    For bulk ingestion.  Files are independent, so this scales with cores
+    without splitting pages; workers are recycled every few files to bound
+    pdfminer's memory growth.  Output order follows ``paths``; chunk ids are
+    already scoped by source file.
+    """
+    if len(paths) < 2:
+        return list(chain.from_iterable(map(extract_tables_from_pdf, paths)))
+    processes = min(os.cpu_count() or 1, len(paths))
+    with multiprocessing.Pool(processes=processes, maxtasksperchild=4) as pool:
+        return list(chain.from_iterable(pool.imap(extract_tables_from_pdf, paths, chunksize=1)))
@@ -0,0 +1,75 @@
+"""Content-hash registry of ingested uploads.
+
+Maps the SHA-256 of an uploaded file (per collection) to the result of its
+first ingestion, so re-uploading identical bytes can skip parsing, chunking
+and embedding entirely.  Backed by a small SQLite file under ``data_dir``.
+"""
+import sqlite3
+import threading
+from functools import lru_cache
+
+from app.config import get_settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    hash        TEXT NOT NULL,
+    collection  TEXT NOT NULL,
+    file_id     TEXT NOT NULL,
+    filename    TEXT NOT NULL,
+    chunks      INTEGER NOT NULL,
+    tables      INTEGER NOT NULL,
+    sections    INTEGER NOT NULL,
+    PRIMARY KEY (hash, collection)
+)
+"""
+
+_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _connect() -> sqlite3.Connection:
+    s = get_settings()
+    s.data_dir.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(s.data_dir / "uploads.db"), check_same_thread=False)
+    conn.execute(_SCHEMA)
+    conn.commit()
+    return conn
+
+
+def lookup_upload(digest: str, collection_name: str) -> dict | None:
+    """Return the recorded ingestion for ``digest`` in ``collection_name``, if any."""
+    with _LOCK:
+        row = _connect().execute(
+            "SELECT file_id, filename, chunks, tables, sections FROM uploads "
+            "WHERE hash = ? AND collection = ?",
+            (digest, collection_name),
+        ).fetchone()
+    if row is None:
+        return None
+    file_id, filename, chunks, tables, sections = row
+    return {
+        "file_id": file_id,
+        "filename": filename,
+        "chunks_ingested": chunks,
+        "tables_ingested": tables,
+        "sections_detected": sections,
+    }
+
+
+def record_upload(
+    digest: str,
+    collection_name: str,
+    file_id: str,
+    filename: str,
+    chunks: int,
+    tables: int,
+    sections: int,
+) -> None:
+    """Remember a successful ingestion so identical re-uploads can reuse it."""
+    with _LOCK:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (digest, collection_name, file_id, filename, chunks, tables, sections),
+        )
+        conn.commit()
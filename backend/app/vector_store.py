@@ -1,24 +1,205 @@
 """Vector store (Chroma) for document embeddings and semantic search."""
+import asyncio
+import hashlib
+from functools import lru_cache
 from pathlib import Path
 
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
 
 from app.config import get_settings
-from app.embeddings import get_embeddings
+from app import vector_store_faiss
+from app.embeddings import embed_batch, get_embeddings
+from app.retrieval_cache import CACHE_TOP_K, SemanticCache
 
+DEFAULT_MAX_BATCH = 5000   # fallback when the client cannot report its limit
+TABLES_SUFFIX = "_tables"  # table-only companion collection, e.g. policy_docs_tables
 
-def get_vector_store(collection_name: str = "policy_docs"):
-    """Get or create a Chroma collection. Persists to disk."""
+
+def _collection_metadata(collection_name: str) -> dict:
+    """HNSW parameters applied when a collection is first created.
+
+    Chroma ignores them for existing collections.  Defaults (see config.py)
+    favour recall for policy corpora in the 10k–100k chunk range; compare_*
+    collections are short-lived and only used for /compare_documents, so they
+    search with a smaller ef.
+    """
     s = get_settings()
-    s.chroma_persist_dir.mkdir(parents=True, exist_ok=True)
+    return {
+        "hnsw:space": "cosine",
+        "hnsw:M": s.hnsw_m,
+        "hnsw:construction_ef": s.hnsw_construction_ef,
+        "hnsw:search_ef": (
+            s.hnsw_compare_search_ef if collection_name.startswith("compare_")
+            else s.hnsw_search_ef
+        ),
+    }
+
+
+@lru_cache(maxsize=16)
+def _cached_store(collection_name: str, persist_dir: str) -> Chroma:
+    Path(persist_dir).mkdir(parents=True, exist_ok=True)
     return Chroma(
         collection_name=collection_name,
         embedding_function=get_embeddings(),
-        persist_directory=str(s.chroma_persist_dir),
+        persist_directory=persist_dir,
+        collection_metadata=_collection_metadata(collection_name),
+    )
+
+
+def get_vector_store(collection_name: str = "policy_docs"):
+    """Get or create a Chroma collection. Persists to disk.
+
+    Handles are cached per collection, so searches reuse one client and
+    collection object instead of re-opening them on every call.
+    """
+    return _cached_store(collection_name, str(get_settings().chroma_persist_dir))
+
+
+@lru_cache(maxsize=2048)
+def _embed_query_cached(query: str) -> tuple[float, ...]:
+    return tuple(get_embeddings().embed_query(query))
+
+
+def embed_query(query: str) -> list[float]:
+    """Embed a search query, memoised on the stripped text.
+
+    Repeat questions (common in policy Q&A) skip the embedding model entirely.
+    """
+    return list(_embed_query_cached(query.strip()))
+
+
+_RETRIEVAL_CACHES: dict[str, SemanticCache] = {}
+
+
+def _retrieval_cache(collection_name: str) -> SemanticCache | None:
+    """Per-collection semantic cache of search hits (None when disabled)."""
+    s = get_settings()
+    if not s.retrieval_cache:
+        return None
+    cache = _RETRIEVAL_CACHES.get(collection_name)
+    if cache is None:
+        cache = _RETRIEVAL_CACHES.setdefault(
+            collection_name,
+            SemanticCache(
+                s.retrieval_cache_size,
+                s.retrieval_cache_threshold,
+                s.retrieval_cache_ttl,
+                s.retrieval_cache_lsh_min_entries,
+            ),
+        )
+    return cache
+
+
+def _clear_retrieval_cache(collection_name: str) -> None:
+    cache = _RETRIEVAL_CACHES.get(collection_name)
+    if cache is not None:
+        cache.clear()   # new chunks can change any query's hits
+
+
+def _scored_search(
+    embedding: list[float],
+    k: int,
+    collection_name: str,
+) -> list[tuple[Document, float]]:
+    """Top-k ``(Document, relevance)`` for a query vector, via the semantic cache."""
+    cache = _retrieval_cache(collection_name)
+    if cache is not None:
+        hits = cache.get(embedding, k)
+        if hits is not None:
+            return hits
+    fetch = k if cache is None else max(k, CACHE_TOP_K)
+    hits = _query([embedding], fetch, collection_name)[0]
+    if cache is not None:
+        cache.put(embedding, fetch, hits)
+    return hits[:k]
+
+
+def _uses_faiss(collection_name: str) -> bool:
+    # compare_* collections are small and read back whole by diff.py, so
+    # they always stay in Chroma.
+    return (
+        get_settings().vector_backend.lower() == "faiss"
+        and not collection_name.startswith("compare_")
     )
 
 
+def _query(
+    embeddings: list[list[float]],
+    k: int,
+    collection_name: str,
+    filter: dict | None = None,
+) -> list[list[tuple[Document, float]]]:
+    """One multi-vector search on the configured backend; raises on failure."""
+    if _uses_faiss(collection_name):
+        return vector_store_faiss.search_many_by_vector(embeddings, k, collection_name, filter)
+    store = get_vector_store(collection_name=collection_name)
+    relevance = store._select_relevance_score_fn()
+    res = store._collection.query(
+        query_embeddings=embeddings,
+        n_results=k,
+        where=filter,
+        include=["documents", "metadatas", "distances"],
+    )
+    return [
+        [
+            (Document(page_content=text, metadata=meta or {}, id=doc_id), relevance(dist))
+            for doc_id, text, meta, dist in zip(ids, texts, metas, dists)
+        ]
+        for ids, texts, metas, dists in zip(
+            res["ids"], res["documents"], res["metadatas"], res["distances"]
+        )
+    ]
+
+
+def tables_collection_name(collection_name: str) -> str:
+    """Name of the Chroma collection holding only ``collection_name``'s tables."""
+    return f"{collection_name}{TABLES_SUFFIX}"
+
+
+def _table_query(
+    embeddings: list[list[float]],
+    k: int,
+    collection_name: str,
+) -> list[list[tuple[Document, float]]]:
+    """Top-k table chunks per query vector.
+
+    Chroma: an unfiltered search of the table-only collection.  Collections
+    indexed before it existed fall back to the ``is_table`` filter.  FAISS
+    restricts its search with an ID selector, so it always filters.
+    """
+    if not _uses_faiss(collection_name):
+        hits = _query(embeddings, k, tables_collection_name(collection_name))
+        if any(hits):
+            return hits
+    return _query(embeddings, k, collection_name, filter={"is_table": True})
+
+
+def _stored_or_new_embeddings(store, texts: list[str], hashes: list[str]) -> list[list[float]]:
+    """Reuse vectors already stored for identical chunk text; embed the rest.
+
+    Lookup is by the ``content_hash`` metadata field, so re-uploading a
+    revised policy only embeds the chunks whose text actually changed.
+    """
+    known: dict[str, list[float]] = {}
+    try:
+        found = store._collection.get(
+            where={"content_hash": {"$in": list(set(hashes))}},
+            include=["metadatas", "embeddings"],
+        )
+        for meta, vector in zip(found["metadatas"], found["embeddings"]):
+            known[meta["content_hash"]] = list(vector)
+    except Exception:
+        pass
+
+    missing = [i for i, h in enumerate(hashes) if h not in known]
+    if missing:
+        # One batched embedding call for the rest (duplicates embedded once)
+        for i, vector in zip(missing, embed_batch([texts[i] for i in missing])):
+            known[hashes[i]] = list(vector)
+    return [known[h] for h in hashes]
+
+
 def add_documents_to_store(
     documents: list[Document],
     collection_name: str = "policy_docs",
@@ -27,10 +208,64 @@ def add_documents_to_store(
 
     Uses ``chunk_id`` from each document's metadata as the Chroma document id.
     This ensures idempotent re-ingestion (same chunk won't be duplicated).
+    Each chunk is also stamped with ``content_hash`` (SHA-256 of its text) so
+    unchanged chunks reuse their stored embedding instead of being re-embedded.
     """
+    if not documents:
+        return
+    if _uses_faiss(collection_name):
+        vector_store_faiss.add_documents_to_store(documents, collection_name)
+        _clear_retrieval_cache(collection_name)
+        return
     store = get_vector_store(collection_name=collection_name)
     ids = [doc.metadata.get("chunk_id", str(i)) for i, doc in enumerate(documents)]
-    store.add_documents(documents, ids=ids)
+    texts = [doc.page_content for doc in documents]
+    hashes = [hashlib.sha256(t.encode("utf-8")).hexdigest() for t in texts]
+    embeddings = _stored_or_new_embeddings(store, texts, hashes)
+    metadatas = [{**doc.metadata, "content_hash": h} for doc, h in zip(documents, hashes)]
+    _upsert(store, ids, embeddings, metadatas, texts)
+
+    # Table chunks are also written, with the same vectors, to a table-only
+    # collection so table searches need no metadata filter.
+    rows = [i for i, meta in enumerate(metadatas) if meta.get("is_table")]
+    if rows:
+        _upsert(
+            get_vector_store(collection_name=tables_collection_name(collection_name)),
+            [ids[i] for i in rows],
+            [embeddings[i] for i in rows],
+            [metadatas[i] for i in rows],
+            [texts[i] for i in rows],
+        )
+    _clear_retrieval_cache(collection_name)
+
+
+def _upsert(store, ids: list[str], embeddings: list, metadatas: list[dict], texts: list[str]) -> None:
+    # Embeddings are computed for the whole list up front; writes are split
+    # only to stay under the client's per-call record limit.
+    try:
+        max_batch = store._client.get_max_batch_size()
+    except Exception:
+        max_batch = DEFAULT_MAX_BATCH
+    for i in range(0, len(ids), max_batch):
+        j = i + max_batch
+        store._collection.upsert(
+            ids=ids[i:j],
+            embeddings=embeddings[i:j],
+            metadatas=metadatas[i:j],
+            documents=texts[i:j],
+        )
+
+
+async def add_documents_to_store_async(
+    documents: list[Document],
+    collection_name: str = "policy_docs",
+) -> None:
+    """:func:`add_documents_to_store` without blocking the event loop.
+
+    Embedding and the Chroma writes run in a worker thread, so other requests
+    keep being served while a large upload is indexed.
+    """
+    await asyncio.to_thread(add_documents_to_store, documents, collection_name)
 
 
 def search_similar(
@@ -45,8 +280,7 @@ def search_similar(
         - ``source``    : str
         - ``chunk_id``  : str
     """
-    store = get_vector_store(collection_name=collection_name)
-    return store.similarity_search(query, k=k)
+    return [doc for doc, _ in _scored_search(embed_query(query), k, collection_name)]
 
 
 def search_similar_with_scores(
@@ -61,8 +295,7 @@ def search_similar_with_scores(
 
     Returns list of (Document, score) tuples, sorted by score descending.
     """
-    store = get_vector_store(collection_name=collection_name)
-    return store.similarity_search_with_relevance_scores(query, k=k)
+    return _scored_search(embed_query(query), k, collection_name)
 
 
 def search_tables(
@@ -75,16 +308,52 @@ def search_tables(
     Used for numeric_lookup queries to prioritise structured table data.
     Falls back to regular search if no tables are found.
     """
-    store = get_vector_store(collection_name=collection_name)
+    embedding = embed_query(query)
     try:
-        results = store.similarity_search(
-            query,
-            k=k,
-            filter={"is_table": True},
-        )
+        results = _table_query([embedding], k, collection_name)[0]
         if results:
-            return results
+            return [doc for doc, _ in results]
     except Exception:
         pass
-    # Fallback: regular search (tables may be mixed in with text)
-    return store.similarity_search(query, k=k)
+    # Fallback: regular search (tables may be mixed in with text), reusing
+    # the same query vector and the semantic retrieval cache.
+    return [doc for doc, _ in _scored_search(embedding, k, collection_name)]
+
+
+def search_with_tables(
+    query: str,
+    k: int = 5,
+    collection_name: str = "policy_docs",
+) -> tuple[list[tuple[Document, float]], list[Document]]:
+    """Top-k scored chunks plus the top-k table chunks for one query.
+
+    Equivalent to ``search_similar_with_scores`` + ``search_tables`` but the
+    query is embedded once and reused for both searches.
+    Used for numeric_lookup queries.
+    """
+    embedding = embed_query(query)
+    scored = _scored_search(embedding, k, collection_name)
+    try:
+        tables = [doc for doc, _ in _table_query([embedding], k, collection_name)[0]]
+    except Exception:
+        tables = []
+    return scored, tables
+
+
+def search_many_by_vector(
+    embeddings: list[list[float]],
+    k: int = 5,
+    collection_name: str = "policy_docs",
+    filter: dict | None = None,
+) -> list[list[tuple[Document, float]]]:
+    """Top-k chunks with relevance scores for several query vectors at once.
+
+    Issues a single multi-query search; returns one list of
+    ``(Document, relevance)`` per input vector, best first.  Store errors
+    propagate, as they do for single-query searches.
+    """
+    if not embeddings:
+        return []
+    if filter == {"is_table": True}:
+        return _table_query(embeddings, k, collection_name)
+    return _query(embeddings, k, collection_name, filter)
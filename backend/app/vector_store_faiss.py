@@ -0,0 +1,251 @@
+"""FAISS vector store backend (``VECTOR_BACKEND=faiss``).
+
+An alternative to Chroma for large policy corpora.  Each collection lives in
+``data_dir/faiss/<collection>/``:
+
+  - ``index.faiss`` — an ``IndexHNSWFlat`` (or ``IndexHNSWSQ`` with
+    ``FAISS_SQ8=true``) over L2-normalised vectors, inner-product metric.
+    It is written with ``faiss.write_index`` after each ingest and read
+    back whole on first use (HNSW graphs are not memory-mappable in faiss).
+  - ``meta.sqlite`` — one row per vector: ``vid`` (its position in the
+    index), ``chunk_id``, ``content_hash``, text and metadata.
+
+HNSW cannot delete, so re-ingesting a chunk with changed text appends a new
+vector and marks the old row dead; searches exclude dead rows with an
+``IDSelector``.  Scores are cosine similarities, matching the relevance
+scores of the Chroma backend.
+
+The public functions mirror :mod:`app.vector_store`, which dispatches here.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.config import get_settings
+from app.embeddings import embed_batch
+
+try:
+    import faiss  # optional: pip install faiss-cpu
+except ImportError:
+    faiss = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    vid           INTEGER PRIMARY KEY,
+    chunk_id      TEXT NOT NULL,
+    content_hash  TEXT NOT NULL,
+    is_table      INTEGER NOT NULL,
+    live          INTEGER NOT NULL,
+    text          TEXT NOT NULL,
+    metadata      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_chunk_id ON chunks (chunk_id) WHERE live = 1;
+CREATE INDEX IF NOT EXISTS chunks_content_hash ON chunks (content_hash);
+"""
+
+
+_SQL_VARS = 900   # bound parameters per IN (...) query
+
+
+def _select_in(db: sqlite3.Connection, sql: str, values: list) -> list[tuple]:
+    """Run ``sql`` (containing one ``IN ({})``) over ``values`` in slices."""
+    rows = []
+    for i in range(0, len(values), _SQL_VARS):
+        part = values[i:i + _SQL_VARS]
+        rows += db.execute(sql.format(",".join("?" * len(part))), part).fetchall()
+    return rows
+
+
+class _Collection:
+    """Index + metadata for one collection; all access goes through ``lock``."""
+
+    def __init__(self, path: Path):
+        path.mkdir(parents=True, exist_ok=True)
+        self.index_path = path / "index.faiss"
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(path / "meta.sqlite"), check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+        self.index = None
+        if self.index_path.exists():
+            self.index = faiss.read_index(str(self.index_path))
+        self._load_dead()
+
+    def _load_dead(self) -> None:
+        rows = self.db.execute("SELECT vid FROM chunks WHERE live = 0").fetchall()
+        self.dead = np.array([r[0] for r in rows], dtype=np.int64)
+
+
+@lru_cache(maxsize=16)
+def _open(collection_name: str, root: str) -> _Collection:
+    if faiss is None:
+        raise RuntimeError("VECTOR_BACKEND=faiss requires faiss: pip install faiss-cpu")
+    return _Collection(Path(root) / collection_name)
+
+
+def _collection(collection_name: str) -> _Collection:
+    return _open(collection_name, str(get_settings().data_dir / "faiss"))
+
+
+def _new_index(d: int, sample: np.ndarray):
+    s = get_settings()
+    if s.faiss_sq8:
+        # 8-bit codes: ~4x smaller than float32; the quantiser is trained on
+        # the first ingested batch.
+        index = faiss.IndexHNSWSQ(d, faiss.ScalarQuantizer.QT_8bit, s.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.train(sample)
+    else:
+        index = faiss.IndexHNSWFlat(d, s.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = s.hnsw_construction_ef
+    return index
+
+
+def _unit_rows(vectors) -> np.ndarray:
+    x = np.array(vectors, dtype=np.float32)
+    faiss.normalize_L2(x)
+    return x
+
+
+def add_documents_to_store(
+    documents: list[Document],
+    collection_name: str = "policy_docs",
+) -> None:
+    """Upsert chunks by ``chunk_id``; unchanged chunks are left untouched.
+
+    Vectors for text already in the index (same SHA-256 ``content_hash``)
+    are reconstructed from it instead of being re-embedded.
+    """
+    if not documents:
+        return
+    col = _collection(collection_name)
+    ids = [doc.metadata.get("chunk_id", str(i)) for i, doc in enumerate(documents)]
+    texts = [doc.page_content for doc in documents]
+    hashes = [hashlib.sha256(t.encode("utf-8")).hexdigest() for t in texts]
+
+    with col.lock:
+        current = dict(_select_in(
+            col.db,
+            "SELECT chunk_id, content_hash FROM chunks WHERE live = 1 AND chunk_id IN ({})",
+            list(set(ids)),
+        ))
+        # Last occurrence wins for duplicate ids, as with Chroma's upsert.
+        todo = {cid: i for i, cid in enumerate(ids) if current.get(cid) != hashes[i]}
+        if not todo:
+            return
+        rows = list(todo.values())
+
+        known: dict[str, np.ndarray] = {}
+        if col.index is not None:
+            wanted = list({hashes[i] for i in rows})
+            for h, vid in _select_in(
+                col.db,
+                "SELECT content_hash, MAX(vid) FROM chunks WHERE content_hash IN ({}) GROUP BY content_hash",
+                wanted,
+            ):
+                known[h] = col.index.reconstruct(int(vid))
+        missing = [i for i in rows if hashes[i] not in known]
+        if missing:
+            for i, vector in zip(missing, _unit_rows(embed_batch([texts[i] for i in missing]))):
+                known[hashes[i]] = vector
+        vectors = np.stack([known[hashes[i]] for i in rows])
+
+        index = col.index
+        if index is None:
+            index = _new_index(vectors.shape[1], vectors)
+        first_vid = index.ntotal
+        records = [
+            (
+                first_vid + n,
+                ids[i],
+                hashes[i],
+                int(bool(documents[i].metadata.get("is_table"))),
+                texts[i],
+                json.dumps({**documents[i].metadata, "content_hash": hashes[i]}),
+            )
+            for n, i in enumerate(rows)
+        ]
+        try:
+            index.add(vectors)
+            col.db.executemany(
+                "UPDATE chunks SET live = 0 WHERE live = 1 AND chunk_id = ?",
+                [(cid,) for cid in todo if cid in current],
+            )
+            col.db.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, 1, ?, ?)", records)
+            # Write beside and rename so a crash never leaves a torn index file.
+            tmp = col.index_path.with_suffix(".tmp")
+            faiss.write_index(index, str(tmp))
+            os.replace(tmp, col.index_path)
+            col.db.commit()
+        except Exception:
+            # Keep index and metadata in step: discard both in-memory changes.
+            col.db.rollback()
+            col.index = (
+                faiss.read_index(str(col.index_path))
+                if col.index_path.exists() else None
+            )
+            raise
+        col.index = index
+        col._load_dead()
+
+
+def _selector(col: _Collection, filter: dict | None):
+    """IDSelector for live rows (restricted by ``filter``), or None for all rows."""
+    if filter:
+        if set(filter) != {"is_table"}:
+            raise ValueError(f"FAISS backend only filters on is_table, got {filter}")
+        rows = col.db.execute(
+            "SELECT vid FROM chunks WHERE live = 1 AND is_table = ?",
+            (int(bool(filter["is_table"])),),
+        ).fetchall()
+        return faiss.IDSelectorBatch(np.array([r[0] for r in rows], dtype=np.int64))
+    if len(col.dead):
+        return faiss.IDSelectorNot(faiss.IDSelectorBatch(col.dead))
+    return None
+
+
+def search_many_by_vector(
+    embeddings: list[list[float]],
+    k: int = 5,
+    collection_name: str = "policy_docs",
+    filter: dict | None = None,
+) -> list[list[tuple[Document, float]]]:
+    """Top-k ``(Document, cosine similarity)`` per query vector, best first."""
+    if not embeddings:
+        return []
+    col = _collection(collection_name)
+    queries = _unit_rows(embeddings)
+    with col.lock:
+        if col.index is None or col.index.ntotal == 0:
+            return [[] for _ in embeddings]
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = max(get_settings().hnsw_search_ef, k)
+        sel = _selector(col, filter)   # keep a reference for the whole search
+        if sel is not None:
+            params.sel = sel
+        scores, vids = col.index.search(queries, k, params=params)
+
+        found = sorted({int(v) for v in vids.ravel() if v >= 0})
+        rows = {}
+        if found:
+            rows = {
+                vid: (chunk_id, text, metadata)
+                for vid, chunk_id, text, metadata in _select_in(
+                    col.db, "SELECT vid, chunk_id, text, metadata FROM chunks WHERE vid IN ({})", found
+                )
+            }
+    results = []
+    for row_scores, row_vids in zip(scores, vids):
+        hits = []
+        for score, vid in zip(row_scores, row_vids):
+            if vid < 0:
+                continue
+            chunk_id, text, metadata = rows[int(vid)]
+            hits.append((Document(page_content=text, metadata=json.loads(metadata), id=chunk_id), float(score)))
+        results.append(hits)
+    return results
@@ -184,12 +184,44 @@ async function handleAsk() {
     hideEl(askResult);
 
     try {
-        const { ok, data } = await apiFetch('/ask', {
+        const res = await fetch(`${API_BASE}/ask/stream`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ question }),
         });
 
+        let data = {};
+        if (!res.ok) {
+            const text = await res.text();
+            try { data = JSON.parse(text); } catch { data = { error: text }; }
+            answerBox.textContent = data.detail || data.error || 'Request failed.';
+        } else {
+            // Server-sent events: token events as the answer is generated,
+            // then one final event with sources, confidence and gap info.
+            hideEl(gapAlert);
+            hideEl(sourcesWrap);
+            answerBox.textContent = '';
+            showEl(askResult);
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const events = buffer.split('\n\n');
+                buffer = events.pop();
+                for (const evt of events) {
+                    if (!evt.startsWith('data: ')) continue;
+                    const msg = JSON.parse(evt.slice(6));
+                    if (msg.type === 'token') answerBox.textContent += msg.data;
+                    else if (msg.type === 'final') data = msg;
+                }
+            }
+            answerBox.textContent = data.answer || answerBox.textContent || 'No answer returned.';
+        }
+
         // Gap alert
         if (data.gap_detected) {
             gapSuggestion.textContent = data.suggestion || '';
@@ -198,11 +230,6 @@ async function handleAsk() {
             hideEl(gapAlert);
         }
 
-        // Answer
-        answerBox.textContent = ok
-            ? (data.answer || 'No answer returned.')
-            : (data.detail || data.error || 'Request failed.');
-
         // Sources
         renderSources(data.sources, sourcesList, sourcesWrap);
 